@@ -0,0 +1,31 @@
+import argparse
+import json
+
+from benchmarks import suite
+
+# To run:
+# $ python -m benchmarks --output results.json
+# $ python -m benchmarks --cases init_literal setitem --sizes 10 1000
+#
+# Prints a table and, with --output, writes the results as JSON for
+# `python -m benchmarks.compare`.
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--cases", nargs="+", choices=list(suite.CASES), help="cases to run (default: all)")
+    parser.add_argument("--sizes", nargs="+", type=int, default=suite.SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.02, help="seconds per timed run")
+    args = parser.parse_args(argv)
+
+    document = suite.run(args.cases, args.sizes, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(document, output, indent=2)
+            output.write("\n")
+
+
+if __name__ == "__main__":
+    main()
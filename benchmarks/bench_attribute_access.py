@@ -0,0 +1,36 @@
+import timeit
+
+from pyjsonable.strict_objects import StrictDict
+
+# To run:
+# $ python -m benchmarks.bench_attribute_access
+#
+# Compares dot access on StrictDicts against item access and a plain dict.
+
+NUMBER = 1000000
+
+
+class CakeDict(StrictDict):
+    class Meta:
+        required_keys = {"type", "is_vegan"}
+        allowed_keys = {"num_layers", "cups_sugar"}
+
+
+def main():
+    cake = CakeDict(type="birthday", is_vegan=False, num_layers=3)
+    undeclared = StrictDict(type="birthday")
+    plain = dict(type="birthday")
+    cases = (
+        ("dict['key']", lambda: plain["type"]),
+        ("StrictDict['key']", lambda: cake["type"]),
+        ("StrictDict.key (declared)", lambda: cake.type),
+        ("StrictDict.key (undeclared)", lambda: undeclared.type),
+        ("getattr(missing, default)", lambda: getattr(cake, "cups_sugar", None)),
+    )
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=NUMBER, repeat=3))
+        print("%-30s %8.1f ns" % (name, best / NUMBER * 1e9))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import timeit
+
+from pyjsonable.strict_objects import StrictDict
+
+# To run:
+# $ python -m benchmarks.bench_construction
+#
+# Construction and update time per key should stay flat as the dict grows.
+
+SIZES = (1000, 10000, 100000)
+
+
+class FeatureVectorDict(StrictDict):
+    class Meta:
+        cannot_coexist_keys = {"sparse", "dense"}
+        item_type = int
+
+
+def _best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    print("%10s %12s %14s %12s %14s" % ("keys", "init (s)", "init/key (us)", "update (s)", "update/key (us)"))
+    for size in SIZES:
+        features = dict(("f%d" % i, i) for i in range(size))
+        features["dense"] = 1
+        init_time = _best_of(lambda: FeatureVectorDict(features))
+        update_time = _best_of(lambda: FeatureVectorDict().update(features))
+        print("%10d %12.4f %14.3f %12.4f %14.3f" % (
+            size,
+            init_time, init_time / size * 1e6,
+            update_time, update_time / size * 1e6,
+        ))
+
+
+if __name__ == "__main__":
+    main()
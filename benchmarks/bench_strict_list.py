@@ -0,0 +1,39 @@
+import timeit
+
+from pyjsonable.strict_objects import StrictList
+
+# To run:
+# $ python -m benchmarks.bench_strict_list
+#
+# Compares extending a StrictList with 1M items against a plain list.
+
+SIZE = 1000000
+
+
+class TagList(StrictList):
+    class Meta:
+        item_type = str
+
+
+def _best_of(func, repeat=3):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def _append_each(tags):
+    strict_list = TagList()
+    for tag in tags:
+        strict_list.append(tag)
+
+
+def main():
+    tags = ["tag%d" % (i % 1000) for i in range(SIZE)]
+    list_time = _best_of(lambda: [].extend(tags))
+    strict_time = _best_of(lambda: TagList().extend(tags))
+    append_time = _best_of(lambda: _append_each(tags), repeat=1)
+    print("%-28s %10.4f s" % ("list.extend", list_time))
+    print("%-28s %10.4f s (%.1fx)" % ("StrictList.extend", strict_time, strict_time / list_time))
+    print("%-28s %10.4f s" % ("StrictList.append per item", append_time))
+
+
+if __name__ == "__main__":
+    main()
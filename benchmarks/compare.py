@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+
+# To run:
+# $ python -m benchmarks.compare base.json new.json --threshold 1.10
+#
+# Compares two `python -m benchmarks --output` runs case by case and exits
+# with status 1 if any case got slower than the threshold allows. The
+# default metric is each case's ratio to its dict/list baseline, which
+# stays comparable across machines; use --metric seconds on a fixed box.
+
+
+def _key(result):
+    return result["case"], result["config"], result["size"]
+
+
+def compare(base, new, metric="ratio", threshold=1.1):
+    # Returns (key, base value, new value, change) for the cases in both runs
+    # and the keys of those that regressed past threshold
+    base_results = dict((_key(result), result) for result in base["results"])
+    rows = []
+    regressions = []
+    for result in new["results"]:
+        key = _key(result)
+        if key not in base_results:
+            continue
+        before = base_results[key][metric]
+        after = result[metric]
+        change = after / before
+        rows.append((key, before, after, change))
+        if change > threshold:
+            regressions.append(key)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--metric", choices=("ratio", "seconds"), default="ratio")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="largest allowed new/base factor (default: 1.1)")
+    args = parser.parse_args(argv)
+
+    with open(args.base) as base, open(args.new) as new:
+        base, new = json.load(base), json.load(new)
+    rows, regressions = compare(base, new, args.metric, args.threshold)
+
+    print("base: %s (Python %s)" % (base.get("commit"), base.get("python")))
+    print("new:  %s (Python %s)" % (new.get("commit"), new.get("python")))
+    print("%-24s %-28s %6s %12s %12s %8s" % ("case", "config", "size", "base", "new", "change"))
+    for (name, config, size), before, after, change in rows:
+        flag = "  REGRESSED" if change > args.threshold else ""
+        print("%-24s %-28s %6s %12.4g %12.4g %7.2fx%s" % (
+            name, config or "-", size or "-", before, after, change, flag))
+    if regressions:
+        print("%d case(s) regressed past %.2fx" % (len(regressions), args.threshold))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
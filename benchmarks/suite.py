@@ -0,0 +1,364 @@
+import copy
+import json
+import marshal
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from collections import OrderedDict
+
+from pyjsonable import binary, decoder, encoder
+from pyjsonable.strict_objects import StrictDict, StrictList
+
+# The StrictDict/StrictList hot paths, each timed against the same work done
+# with a plain dict/list over a range of sizes. `python -m benchmarks` runs
+# every case; benchmarks.compare diffs two runs' JSON output.
+
+SIZES = (10, 100, 1000)
+
+# Case name -> (setup(config, size) returning (strict, baseline) callables,
+# configs, whether the case takes a size)
+CASES = OrderedDict()
+
+
+def _meta(**attrs):
+    return {"Meta": type("Meta", (), attrs)}
+
+
+# A StrictDict class body per configuration, built for a given set of keys
+META_CONFIGS = OrderedDict([
+    ("none", lambda keys: {}),
+    ("required_keys", lambda keys: _meta(required_keys={keys[0]})),
+    ("at_least_one_required_keys", lambda keys: _meta(at_least_one_required_keys=set(keys[:2]))),
+    ("cannot_coexist_keys", lambda keys: _meta(cannot_coexist_keys={keys[0], "absent"})),
+    ("allowed_keys", lambda keys: _meta(allowed_keys=set(keys))),
+    ("item_type", lambda keys: _meta(item_type=int)),
+    ("item_type_map", lambda keys: _meta(item_type=dict((key, int) for key in keys))),
+    ("annotations", lambda keys: {"__annotations__": dict((key, int) for key in keys)}),
+])
+
+
+def case(name, configs=(None,), sized=True):
+    def register(setup):
+        CASES[name] = (setup, configs, sized)
+        return setup
+    return register
+
+
+def _items(size):
+    return OrderedDict(("k%d" % i, i) for i in range(size))
+
+
+def _config_class(config, keys):
+    return type(config.title().replace("_", "") + "Dict", (StrictDict,), META_CONFIGS[config](keys))
+
+
+def _setitems(obj, items):
+    for key, value in items:
+        obj[key] = value
+    return obj
+
+
+def _append_all(obj, items):
+    for item in items:
+        obj.append(item)
+    return obj
+
+
+@case("init_literal", configs=tuple(META_CONFIGS))
+def _init_literal(config, size):
+    items = dict(_items(size))
+    Class = _config_class(config, sorted(items))
+    return lambda: Class(items), lambda: dict(items)
+
+
+@case("init_kwargs", configs=tuple(META_CONFIGS))
+def _init_kwargs(config, size):
+    items = dict(_items(size))
+    Class = _config_class(config, sorted(items))
+    return lambda: Class(**items), lambda: dict(**items)
+
+
+@case("update", configs=tuple(META_CONFIGS))
+def _update(config, size):
+    items = dict(_items(size))
+    Class = _config_class(config, sorted(items))
+    return lambda: Class.trusted().update(items), lambda: {}.update(items)
+
+
+@case("setitem", configs=tuple(META_CONFIGS))
+def _setitem(config, size):
+    items = list(_items(size).items())
+    Class = _config_class(config, [key for key, value in items])
+    return lambda: _setitems(Class.trusted(), items), lambda: _setitems({}, items)
+
+
+WIDE_SCHEMA_SIZE = 5000
+
+
+@case("wide_schema_init", configs=("item_type_map", "annotations"))
+def _wide_schema_init(config, size):
+    # `size` members against a 5,000-member schema
+    items = dict(_items(size))
+    Class = _config_class(config, sorted(_items(WIDE_SCHEMA_SIZE)))
+    return lambda: Class(items), lambda: dict(items)
+
+
+@case("wide_schema_update", configs=("item_type_map", "annotations"))
+def _wide_schema_update(config, size):
+    items = dict(_items(size))
+    Class = _config_class(config, sorted(_items(WIDE_SCHEMA_SIZE)))
+    return lambda: Class.trusted().update(items), lambda: {}.update(items)
+
+
+class FrostingDict(StrictDict):
+    class Meta:
+        required_keys = {"cups_powdered_sugar"}
+        item_type = {"cups_milk": {"type": int}}
+
+
+class LayerDict(StrictDict):
+    class Meta:
+        required_keys = {"flavor"}
+        item_type = {"flavor": str, "grams": int}
+
+
+class LayerList(StrictList):
+    class Meta:
+        item_type = LayerDict
+
+
+class CakedDictTyped(StrictDict):
+    class Meta:
+        required_keys = {"type", "is_vegan"}
+        allowed_keys = {"cups_sugar", "frosting", "layers"}
+        item_type = {
+            "cups_sugar": int,
+            "is_vegan": bool,
+            "frosting": {"type": FrostingDict, "nullable": True},
+            "layers": LayerList,
+        }
+
+
+class CakeList(StrictList):
+    class Meta:
+        item_type = CakedDictTyped
+
+
+def _raw_cakes(size):
+    return [{
+        "type": "birthday",
+        "is_vegan": bool(i % 2),
+        "cups_sugar": i,
+        "frosting": {"cups_milk": 4, "cups_powdered_sugar": 7},
+        "layers": [{"flavor": "vanilla", "grams": 300}, {"flavor": "lemon", "grams": 250}],
+    } for i in range(size)]
+
+
+def _list_of(*items):
+    return list(items)
+
+
+def _build_cakes(raw_cakes, Cakes, Cake, Frosting, Layers, Layer):
+    return Cakes(*[Cake(
+        cake,
+        frosting=Frosting(cake["frosting"]),
+        layers=Layers(*[Layer(layer) for layer in cake["layers"]]),
+    ) for cake in raw_cakes])
+
+
+@case("nested_init")
+def _nested_init(config, size):
+    raw_cakes = _raw_cakes(size)
+    return (
+        lambda: _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict),
+        lambda: _build_cakes(raw_cakes, _list_of, dict, dict, _list_of, dict),
+    )
+
+
+@case("json_dumps")
+def _json_dumps(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return lambda: encoder.dumps(cakes), lambda: json.dumps(raw_cakes)
+
+
+@case("json_roundtrip")
+def _json_roundtrip(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return (
+        lambda: decoder.loads(json.dumps(cakes), CakeList),
+        lambda: json.loads(json.dumps(raw_cakes)),
+    )
+
+
+# Against marshal of the same tree as plain dicts and lists, the floor for
+# the binary format
+@case("binary_dumps")
+def _binary_dumps(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return lambda: binary.dumps(cakes), lambda: marshal.dumps(raw_cakes)
+
+
+@case("binary_loads")
+def _binary_loads(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    data = binary.dumps(cakes)
+    raw_data = marshal.dumps(raw_cakes)
+    return lambda: binary.loads(data), lambda: marshal.loads(raw_data)
+
+
+@case("pickle_roundtrip")
+def _pickle_roundtrip(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return (
+        lambda: pickle.loads(pickle.dumps(cakes, pickle.HIGHEST_PROTOCOL)),
+        lambda: pickle.loads(pickle.dumps(raw_cakes, pickle.HIGHEST_PROTOCOL)),
+    )
+
+
+@case("copy")
+def _copy(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return lambda: [copy.copy(cake) for cake in cakes], lambda: [copy.copy(cake) for cake in raw_cakes]
+
+
+@case("deepcopy")
+def _deepcopy(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    return lambda: copy.deepcopy(cakes), lambda: copy.deepcopy(raw_cakes)
+
+
+# Patching one member costs the same at every document size
+@case("patch")
+def _patch(config, size):
+    raw_cakes = _raw_cakes(size)
+    cakes = _build_cakes(raw_cakes, CakeList, CakedDictTyped, FrostingDict, LayerList, LayerDict)
+    operations = [{"op": "replace", "path": "/0/frosting/cups_milk", "value": 5}]
+    return lambda: cakes.patch(operations), lambda: raw_cakes[0]["frosting"].update(cups_milk=5)
+
+
+class TagList(StrictList):
+    class Meta:
+        item_type = str
+
+
+@case("list_append")
+def _list_append(config, size):
+    tags = ["tag%d" % i for i in range(size)]
+    return lambda: _append_all(TagList(), tags), lambda: _append_all([], tags)
+
+
+@case("list_extend")
+def _list_extend(config, size):
+    tags = ["tag%d" % i for i in range(size)]
+    return lambda: TagList().extend(tags), lambda: [].extend(tags)
+
+
+@case("dot_access", sized=False)
+def _dot_access(config, size):
+    cake = CakedDictTyped(type="birthday", is_vegan=False)
+    plain = dict(cake)
+    return lambda: cake.type, lambda: plain["type"]
+
+
+@case("undeclared_dot_access", sized=False)
+def _undeclared_dot_access(config, size):
+    cake = StrictDict(type="birthday")
+    plain = dict(cake)
+    return lambda: cake.type, lambda: plain["type"]
+
+
+class ExpenseItem(StrictDict):
+    class Meta:
+        required_keys = {"cost_per_guest", "total_cost"}
+        allowed_keys = {"vendor", "paid"}
+        item_type = {"cost_per_guest": float, "total_cost": float, "vendor": str, "paid": bool}
+
+
+def _expenses(size):
+    return [{"cost_per_guest": i * 0.5, "total_cost": i * 50.0, "vendor": "v%d" % (i % 7), "paid": bool(i % 2)}
+            for i in range(size)]
+
+
+@case("table_build")
+def _table_build(config, size):
+    expenses = _expenses(size)
+    ExpenseTable = ExpenseItem.table_type()
+    return lambda: ExpenseTable(expenses), lambda: [dict(expense) for expense in expenses]
+
+
+@case("table_column_sum")
+def _table_column_sum(config, size):
+    expenses = [ExpenseItem(expense) for expense in _expenses(size)]
+    table = ExpenseItem.table_type()(expenses)
+    return lambda: sum(table.column("total_cost")), lambda: sum([expense["total_cost"] for expense in expenses])
+
+
+def _number_for(func, min_time):
+    # Doubles the loop count until one run takes at least min_time
+    number = 1
+    while True:
+        if timeit.timeit(func, number=number) >= min_time:
+            return number
+        number *= 2
+
+
+def measure(func, repeat, min_time):
+    # Best time per call over `repeat` runs
+    number = _number_for(func, min_time)
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def _commit():
+    try:
+        with open(os.devnull, "w") as devnull:
+            return subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], stderr=devnull).decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases=None, sizes=SIZES, repeat=5, min_time=0.02, out=sys.stdout):
+    # Runs the named cases (all by default) and returns the results document
+    results = []
+    if out is not None:
+        print("%-24s %-28s %6s %14s %14s %8s" % (
+            "case", "config", "size", "strict (us)", "baseline (us)", "ratio"), file=out)
+    for name in cases or CASES:
+        setup, configs, sized = CASES[name]
+        for config in configs:
+            for size in (sizes if sized else (None,)):
+                strict, baseline = setup(config, size)
+                strict_time = measure(strict, repeat, min_time)
+                baseline_time = measure(baseline, repeat, min_time)
+                result = OrderedDict([
+                    ("case", name),
+                    ("config", config),
+                    ("size", size),
+                    ("seconds", strict_time),
+                    ("baseline_seconds", baseline_time),
+                    ("ratio", strict_time / baseline_time),
+                ])
+                results.append(result)
+                if out is not None:
+                    print("%-24s %-28s %6s %14.3f %14.3f %8.2f" % (
+                        name, config or "-", size or "-",
+                        strict_time * 1e6, baseline_time * 1e6, result["ratio"]), file=out)
+    return OrderedDict([
+        ("python", platform.python_version()),
+        ("implementation", platform.python_implementation()),
+        ("platform", platform.platform()),
+        ("commit", _commit()),
+        ("timestamp", time.strftime("%Y-%m-%dT%H:%M:%S")),
+        ("results", results),
+    ])
@@ -0,0 +1,118 @@
+import os
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from pyjsonable.strict_objects import StrictDict, StrictList, _collect_raw_errors
+
+# Bulk validation of record batches against a StrictDict subclass, optionally
+# spread across a process pool. Results come back in input order, and at
+# most `max_pending` chunks are in flight so memory stays bounded however
+# long the input is.
+
+VALIDATION_ERRORS = (AttributeError, TypeError, ValueError)
+
+
+class RecordError:
+    # A record that failed validation, with its position in the input.
+    # `errors` lists every ValidationError found in the record, as
+    # StrictDict.validate() reports them; it is empty for records that could
+    # not be checked member by member, such as lines that aren't JSON.
+    __slots__ = ("index", "error_type", "message", "errors")
+
+    def __init__(self, index, error_type, message, errors=()):
+        self.index = index
+        self.error_type = error_type
+        self.message = message
+        self.errors = list(errors)
+
+    def __repr__(self):
+        return "RecordError(index=%r, error_type=%r, message=%r, errors=%r)" % (
+            self.index, self.error_type, self.message, self.errors)
+
+    def __eq__(self, other):
+        if not isinstance(other, RecordError):
+            return NotImplemented
+        return (self.index, self.error_type, self.message)\
+            == (other.index, other.error_type, other.message)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return RecordError, (self.index, self.error_type, self.message, self.errors)
+
+
+def record_errors(cls, record, raw=False):
+    # The ValidationErrors behind a record `cls` rejected, or [] when the
+    # record isn't the mapping or list `cls` is built from. raw=True checks
+    # plain JSON objects and arrays as the classes they would decode into.
+    if isinstance(cls, type) and issubclass(cls, StrictDict):
+        checkable = isinstance(record, Mapping)
+    elif isinstance(cls, type) and issubclass(cls, StrictList):
+        checkable = isinstance(record, (list, tuple))
+    else:
+        checkable = False
+    if not checkable:
+        return []
+    if raw:
+        errors = []
+        _collect_raw_errors(cls, record, (), errors)
+        return errors
+    return cls.validate(record)
+
+
+def validate_chunk(cls, start, records):
+    results = []
+    for index, record in enumerate(records, start):
+        try:
+            results.append(cls(record))
+        except VALIDATION_ERRORS as error:
+            results.append(RecordError(index, type(error).__name__, str(error),
+                                       record_errors(cls, record)))
+    return results
+
+
+def _chunks(iterable, chunksize):
+    iterator = iter(iterable)
+    start = 0
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def validate_many(cls, iterable, workers=1, chunksize=1000, max_pending=None):
+    # Yields a `cls` instance or a RecordError for each record, in order
+    if workers is None or workers > 1:
+        return _validate_in_pool(cls, iterable, workers, chunksize, max_pending)
+    return _validate_in_process(cls, iterable, chunksize)
+
+
+def _validate_in_process(cls, iterable, chunksize):
+    for start, chunk in _chunks(iterable, chunksize):
+        for result in validate_chunk(cls, start, chunk):
+            yield result
+
+
+def _validate_in_pool(cls, iterable, workers, chunksize, max_pending):
+    workers = workers or os.cpu_count() or 1
+    if max_pending is None:
+        max_pending = 2 * workers
+    pending = deque()
+    with ProcessPoolExecutor(workers) as executor:
+        try:
+            for start, chunk in _chunks(iterable, chunksize):
+                pending.append(executor.submit(validate_chunk, cls, start, chunk))
+                if len(pending) >= max_pending:
+                    for result in pending.popleft().result():
+                        yield result
+            while pending:
+                for result in pending.popleft().result():
+                    yield result
+        finally:
+            # Chunks that haven't started are dropped if the caller stops early
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,250 @@
+import hashlib
+import io
+import marshal
+import mmap
+import sys
+
+from pyjsonable.names import class_name, import_name
+from pyjsonable.strict_objects import StrictDict, StrictList, StrictArray
+
+# Compact binary encoding of StrictDict/StrictList/StrictArray trees for
+# caches and interprocess transport. A tree is rewritten into plain tuples,
+# lists and dicts and serialized with marshal, so both directions run mostly
+# in C and repeated strings are stored once.
+#
+# Each StrictDict becomes a tuple of its class's index in a class table
+# followed by its declared members in a fixed field order, with Ellipsis for
+# missing ones and a trailing dict of any undeclared members. The class table
+# in the header names every class once along with its field order and a
+# fingerprint of its Meta. On load, classes whose fingerprint matches the
+# local class are rebuilt through the trusted path without validation; when
+# the schema has changed since the data was written they are validated.
+#
+# Like marshal and pickle, this is for data you wrote yourself: it is not
+# safe against maliciously constructed input, and class names in the data
+# are imported unless `classes` is given.
+
+MAGIC = b"PJB\x01"
+
+_MARSHAL_VERSION = 4
+
+# Class table entry kinds
+_DICT = 0
+_FROZEN = 1  # StrictDict.frozen_type() of the named class
+_LIST = 2
+_ARRAY = 3
+
+# Class index of plain tuples, which would otherwise read as tagged nodes
+_TUPLE = -1
+
+_ABSENT = Ellipsis
+
+_SCALARS = frozenset((str, int, float, bool, type(None), bytes))
+_dict_get = dict.get
+
+_KIND_BASES = {
+    _DICT: StrictDict,
+    _FROZEN: StrictDict,
+    _LIST: StrictList,
+    _ARRAY: StrictArray,
+}
+
+
+def _type_name(AttrClass):
+    if isinstance(AttrClass, tuple):
+        return tuple(_type_name(Class) for Class in AttrClass)
+    if isinstance(AttrClass, type):
+        return AttrClass.__module__ + "." + AttrClass.__qualname__
+    return repr(AttrClass)
+
+
+def _fingerprint(description):
+    return hashlib.sha1(repr(description).encode("utf-8")).digest()[:8]
+
+
+# class -> (kind, fields, fingerprint)
+_schemas = {}
+
+
+def _schema(cls):
+    schema = _schemas.get(cls)
+    if schema is not None:
+        return schema
+    if issubclass(cls, StrictDict):
+        plan = cls._plan
+        fields = tuple(sorted(plan.declared_keys, key=repr))
+        description = (
+            fields,
+            sorted(plan.required_keys, key=repr),
+            sorted(plan.at_least_one_required_keys, key=repr),
+            sorted(plan.cannot_coexist_keys, key=repr),
+            None if plan.allowed_keys is None else sorted(plan.allowed_keys, key=repr),
+            sorted(((key, _type_name(AttrClass), nullable)
+                    for key, (AttrClass, nullable) in plan.type_specs.items()), key=repr),
+            sorted(((key, repr(hint)) for key, hint in plan.type_hints.items()), key=repr),
+            plan.default_type_spec and (_type_name(plan.default_type_spec[0]), plan.default_type_spec[1]),
+        )
+        kind = _FROZEN if cls.__dict__.get("_frozen_from") else _DICT
+    elif issubclass(cls, StrictList):
+        fields = ()
+        description = _type_name(cls._item_type)
+        kind = _LIST
+    else:
+        fields = ()
+        description = cls._item_typecode
+        kind = _ARRAY
+    schema = _schemas[cls] = (kind, fields, _fingerprint((kind, description)))
+    return schema
+
+
+class _Writer:
+    def __init__(self):
+        self.header = []
+        self.indexes = {}
+
+    def class_index(self, cls):
+        index = self.indexes.get(cls)
+        if index is None:
+            kind, fields, fingerprint = _schema(cls)
+            named = cls._frozen_from if kind == _FROZEN else cls
+            index = self.indexes[cls] = len(self.header)
+            self.header.append((class_name(named), kind, fields, fingerprint))
+        return index
+
+    def value(self, value):
+        value_type = type(value)
+        if value_type in _SCALARS:
+            return value
+        if isinstance(value, StrictDict):
+            return self.strict_dict(value)
+        if isinstance(value, StrictList):
+            return (self.class_index(value_type), [self.value(item) for item in value])
+        if isinstance(value, StrictArray):
+            return (self.class_index(value_type), value.tobytes())
+        if value_type is list:
+            return [self.value(item) for item in value]
+        if value_type is tuple:
+            return (_TUPLE,) + tuple([self.value(item) for item in value])
+        if value_type is dict:
+            return dict((key, self.value(item)) for key, item in value.items())
+        raise TypeError(repr(value) + " is not supported by the binary format")
+
+    def strict_dict(self, obj):
+        index = self.class_index(type(obj))
+        fields = self.header[index][2]
+        node = [index]
+        present = 0
+        # dict.get, so lazy members are written as they are held
+        for key in fields:
+            item = _dict_get(obj, key, _ABSENT)
+            if item is not _ABSENT:
+                present += 1
+                if type(item) not in _SCALARS:
+                    item = self.value(item)
+            node.append(item)
+        if present != len(obj):
+            declared = frozenset(fields)
+            node.append(dict((key, self.value(item)) for key, item in dict.items(obj)
+                             if key not in declared))
+        return tuple(node)
+
+
+def dumps(obj):
+    # Returns bytes for a StrictDict/StrictList/StrictArray tree, or any
+    # JSON-like value containing them
+    writer = _Writer()
+    root = writer.value(obj)
+    return MAGIC + marshal.dumps((tuple(writer.header), sys.byteorder, root), _MARSHAL_VERSION)
+
+
+def dump(obj, fp):
+    fp.write(dumps(obj))
+
+
+def _find_class(name, classes):
+    if classes is not None:
+        return classes.get(name)
+    return import_name(name)
+
+
+class _Reader:
+    def __init__(self, header, byteorder, classes):
+        if classes is not None:
+            classes = dict((class_name(cls), cls) for cls in classes)
+        self.swap_bytes = byteorder != sys.byteorder
+        # index -> (class, kind, fields, whether the schema matches)
+        self.classes = []
+        for name, kind, fields, fingerprint in header:
+            cls = _find_class(name, classes)
+            if not (isinstance(cls, type) and issubclass(cls, _KIND_BASES[kind])):
+                raise ValueError("cannot find the class " + name
+                                 + "; import it or pass it in `classes`")
+            if kind == _FROZEN:
+                cls = cls.frozen_type()
+            self.classes.append((cls, kind, fields, _schema(cls)[2] == fingerprint))
+
+    def value(self, value):
+        value_type = type(value)
+        if value_type is tuple:
+            return self.node(value)
+        if value_type is list:
+            return [self.value(item) if type(item) not in _SCALARS else item for item in value]
+        if value_type is dict:
+            return dict((key, self.value(item) if type(item) not in _SCALARS else item)
+                        for key, item in value.items())
+        return value
+
+    def node(self, node):
+        index = node[0]
+        if index == _TUPLE:
+            return tuple([self.value(item) for item in node[1:]])
+        cls, kind, fields, trusted = self.classes[index]
+        if kind == _LIST:
+            items = self.value(node[1])
+            if trusted:
+                return cls.trusted(items)
+            return cls(*items)
+        if kind == _ARRAY:
+            strict_array = cls()
+            strict_array.frombytes(node[1])
+            if self.swap_bytes:
+                strict_array.byteswap()
+            return strict_array
+
+        members = dict(zip(fields, node[1:]))
+        absent = False
+        for key, item in members.items():
+            if type(item) not in _SCALARS:
+                if item is _ABSENT:
+                    absent = True
+                else:
+                    members[key] = self.value(item)
+        if absent:
+            members = dict((key, item) for key, item in members.items() if item is not _ABSENT)
+        if len(node) > len(fields) + 1:
+            members.update(self.value(node[-1]))
+        if trusted:
+            return cls.trusted(members)
+        return cls(members)
+
+
+def loads(data, classes=None):
+    # `data` is any bytes-like object, including an mmap. `classes`
+    # restricts the StrictDict/StrictList/StrictArray classes that can be
+    # built to the ones given instead of importing them by name.
+    with memoryview(data) as view:
+        if view[:len(MAGIC)] != MAGIC:
+            raise ValueError("not pyjsonable binary data")
+        with view[len(MAGIC):] as payload:
+            header, byteorder, root = marshal.loads(payload)
+    return _Reader(header, byteorder, classes).value(root)
+
+
+def load(fp, classes=None):
+    # Maps real files into memory rather than reading them
+    try:
+        fileno = fp.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return loads(fp.read(), classes)
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+        return loads(mapped, classes)
@@ -0,0 +1,205 @@
+import asyncio
+import json
+from collections import deque
+
+from pyjsonable.batch import VALIDATION_ERRORS, RecordError, record_errors
+from pyjsonable.strict_objects import StrictDict, StrictList, StrictArray, _class_in
+
+# Decodes JSON straight into typed StrictDict/StrictList trees. Objects are
+# held as their key/value pairs until the enclosing container is built, at
+# which point the parent's Meta.item_type picks the class to build, so every
+# object is only created once.
+
+
+class _Pairs(list):
+    # A decoded JSON object whose class is not known yet
+    __slots__ = ()
+
+
+def _convert(value, AttrClass, trusted):
+    value_type = type(value)
+    if value_type is _Pairs:
+        DictClass = _class_in(AttrClass, StrictDict)
+        if DictClass is not None:
+            return _build_dict(DictClass, value, trusted)
+        return dict(_convert_pairs(value, None, trusted))
+    if value_type is list:
+        ListClass = _class_in(AttrClass, (StrictList, StrictArray))
+        if ListClass is None:
+            return _convert_items(value, None, trusted)
+        if issubclass(ListClass, StrictArray):
+            # Numbers only, which the array's typecode checks
+            return ListClass(*value)
+        items = _convert_items(value, ListClass._item_type, trusted)
+        if trusted:
+            return ListClass.trusted(items)
+        return ListClass(*items)
+    return value
+
+
+def _convert_pairs(pairs, plan, trusted):
+    for index, (key, value) in enumerate(pairs):
+        if type(value) is _Pairs or type(value) is list:
+            AttrClass = None
+            # Meta.lazy_keys values stay plain until they are read
+            if plan is not None and key not in plan.lazy_types:
+                AttrClass = plan.get_type(key)
+            pairs[index] = (key, _convert(value, AttrClass, trusted))
+    return pairs
+
+
+def _convert_items(items, item_type, trusted):
+    for index, value in enumerate(items):
+        if type(value) is _Pairs or type(value) is list:
+            items[index] = _convert(value, item_type, trusted)
+    return items
+
+
+def _build_dict(DictClass, pairs, trusted):
+    _convert_pairs(pairs, DictClass._plan, trusted)
+    if trusted:
+        return DictClass.trusted(pairs)
+    return DictClass(pairs)
+
+
+class StrictJSONDecoder(json.JSONDecoder):
+    # json.JSONDecoder that builds `root` (a StrictDict or StrictList subclass)
+    # and the classes its Meta.item_type declares at each nesting level.
+    # trusted=True builds StrictDicts and StrictLists with their trusted().
+    def __init__(self, root=None, trusted=False, **kwargs):
+        kwargs["object_pairs_hook"] = _Pairs
+        super().__init__(**kwargs)
+        self.root = root
+        self.trusted = trusted
+
+    def decode(self, s, *args, **kwargs):
+        value = super().decode(s, *args, **kwargs)
+        return _convert(value, self.root, self.trusted)
+
+
+def loads(s, root, trusted=False, **kwargs):
+    return json.loads(s, cls=StrictJSONDecoder, root=root, trusted=trusted, **kwargs)
+
+
+def load(fp, root, trusted=False, **kwargs):
+    return json.load(fp, cls=StrictJSONDecoder, root=root, trusted=trusted, **kwargs)
+
+
+def _decode_lines(decoder, start, lines, errors):
+    # Decodes NDJSON lines numbered from `start`, skipping blank ones. With
+    # errors="yield", lines that fail to decode or validate come out as
+    # batch.RecordErrors instead of raising.
+    if errors not in ("raise", "yield"):
+        raise ValueError("errors must be 'raise' or 'yield', not " + repr(errors))
+    for index, line in enumerate(lines, start):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            line = line.strip()
+            if not line:
+                continue
+            value = decoder.decode(line)
+        except VALIDATION_ERRORS as error:
+            if errors == "raise":
+                raise
+            value = RecordError(index, type(error).__name__, str(error), _line_errors(decoder, line, error))
+        yield value
+
+
+def _line_errors(decoder, line, error):
+    # Lines that aren't UTF-8 or JSON have no members to report on
+    if isinstance(error, (UnicodeDecodeError, json.JSONDecodeError)):
+        return []
+    return record_errors(decoder.root, json.loads(line), raw=True)
+
+
+def decode_batch(root, trusted, errors, start, lines):
+    # A list of results for one batch of lines; runs in executors, including
+    # process pools
+    decoder = StrictJSONDecoder(root=root, trusted=trusted)
+    return list(_decode_lines(decoder, start, lines, errors))
+
+
+def iter_ndjson(lines, root, trusted=False, errors="raise", **kwargs):
+    # Yields one `root` per line of newline-delimited JSON. `lines` can be
+    # any text or binary file object (or iterable of lines); only one line
+    # is held in memory at a time.
+    decoder = StrictJSONDecoder(root=root, trusted=trusted, **kwargs)
+    return _decode_lines(decoder, 0, lines, errors)
+
+
+class _ReadFailed:
+    def __init__(self, error):
+        self.error = error
+
+
+_END_OF_STREAM = object()
+
+
+async def _read_lines(stream, queue):
+    # Moves lines into the bounded queue, so reading pauses while it is full
+    try:
+        async for line in stream:
+            await queue.put(line)
+    except asyncio.CancelledError:
+        raise
+    except Exception as error:
+        await queue.put(_ReadFailed(error))
+    else:
+        await queue.put(_END_OF_STREAM)
+
+
+async def aiter_ndjson(stream, root, trusted=False, errors="raise", batch_size=100, max_pending=4,
+                       executor=None):
+    # Async version of iter_ndjson for a stream of lines such as an
+    # asyncio.StreamReader. At most batch_size * max_pending lines are read
+    # ahead of what has been yielded. Lines already read are decoded in
+    # batches of up to batch_size, without waiting for a batch to fill up;
+    # with an `executor`, up to max_pending batches are decoded there at once
+    # instead of on the event loop.
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=batch_size * max_pending)
+    reader = loop.create_task(_read_lines(stream, queue))
+    pending = deque()
+    start = 0
+    end_of_stream = False
+    read_failed = None
+    try:
+        while not end_of_stream:
+            batch = []
+            line = await queue.get()
+            while True:
+                if line is _END_OF_STREAM or isinstance(line, _ReadFailed):
+                    end_of_stream = True
+                    read_failed = line if line is not _END_OF_STREAM else None
+                    break
+                batch.append(line)
+                if len(batch) >= batch_size or queue.empty():
+                    break
+                line = queue.get_nowait()
+            if not batch:
+                continue
+
+            if executor is None:
+                for value in decode_batch(root, trusted, errors, start, batch):
+                    yield value
+                # Let other tasks run between batches
+                await asyncio.sleep(0)
+            else:
+                pending.append(loop.run_in_executor(
+                    executor, decode_batch, root, trusted, errors, start, batch))
+                # Hand results over once there is nothing else to submit
+                while pending and (len(pending) >= max_pending or pending[0].done() or queue.empty()):
+                    for value in await pending.popleft():
+                        yield value
+            start += len(batch)
+        while pending:
+            for value in await pending.popleft():
+                yield value
+        # Everything read before a stream error is yielded first
+        if read_failed is not None:
+            raise read_failed.error
+    finally:
+        reader.cancel()
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,203 @@
+import array
+import io
+import json
+from json.encoder import encode_basestring_ascii
+
+from pyjsonable.strict_objects import StrictDict, StrictRecord
+from pyjsonable.table import StrictTable
+
+# Schema-specialized JSON encoding for StrictDict trees. The output matches
+# json.dumps with its default arguments. Each StrictDict subclass gets an
+# encoder built from its compiled Meta, with the JSON fragments for its
+# declared keys precomputed and a fast path for each declared item_type.
+
+INFINITY = float("inf")
+
+_generic = json.JSONEncoder()
+
+
+def _encode_float(o):
+    if o != o:
+        return "NaN"
+    if o == INFINITY:
+        return "Infinity"
+    if o == -INFINITY:
+        return "-Infinity"
+    return repr(o)
+
+
+def _encode_true_false(o):
+    return "true" if o else "false"
+
+
+def _encode_null(o):
+    return "null"
+
+
+_SCALAR_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: _encode_true_false,
+    type(None): _encode_null,
+}
+_dict_items = dict.items
+
+
+def _encode_key(key):
+    if isinstance(key, str):
+        return encode_basestring_ascii(key)
+    scalar_encoder = _SCALAR_ENCODERS.get(type(key))
+    if scalar_encoder is None:
+        # Subclassed numbers such as IntEnum members, as json encodes them
+        if isinstance(key, float):
+            scalar_encoder = _encode_float
+        elif isinstance(key, int):
+            scalar_encoder = int.__repr__
+        else:
+            raise TypeError("keys must be str, int, float, bool or None, not "
+                + type(key).__name__)
+    return '"' + scalar_encoder(key) + '"'
+
+
+def _encode_dict(obj, markers, items=_dict_items):
+    parts = []
+    for key, value in items(obj):
+        parts.append(_encode_key(key) + ": " + _encode_value(value, markers))
+    return "{" + ", ".join(parts) + "}"
+
+
+def _encode_value(value, markers):
+    # `markers` holds the ids of the containers being encoded, as json's
+    # check_circular does
+    scalar_encoder = _SCALAR_ENCODERS.get(type(value))
+    if scalar_encoder is not None:
+        return scalar_encoder(value)
+    marker = id(value)
+    if marker in markers:
+        raise ValueError("Circular reference detected")
+    markers.add(marker)
+    if isinstance(value, StrictDict):
+        encoded = get_encoder(type(value)).encode(value, markers)
+    elif isinstance(value, (list, tuple)):
+        encoded = "[" + ", ".join([_encode_value(item, markers) for item in value]) + "]"
+    elif isinstance(value, dict):
+        encoded = _encode_dict(value, markers)
+    elif isinstance(value, array.array):
+        encoded = "[" + ", ".join([_encode_value(item, markers) for item in value.tolist()]) + "]"
+    elif isinstance(value, StrictRecord):
+        encoded = _encode_dict(value, markers, StrictRecord.items)
+    elif isinstance(value, StrictTable):
+        encoded = _encode_table(value, markers)
+    else:
+        # Subclassed scalars and anything json needs `default` for
+        encoded = _generic.encode(value)
+    markers.remove(marker)
+    return encoded
+
+
+class StrictDictEncoder:
+    def __init__(self, cls):
+        self.cls = cls
+        self.fields = {}
+        self.default_fast_path = None
+        self.lazy = False
+
+    def compile(self):
+        # Separate from __init__ so classes that nest themselves resolve
+        plan = self.cls._plan
+        # Lazy members are converted, and so validated, before encoding
+        self.lazy = bool(plan.lazy_types)
+        # key -> (JSON fragment, exact declared type, its encoder, whether the
+        # encoder is a nested StrictDict one taking markers)
+        for key in plan.declared_keys:
+            if isinstance(key, str):
+                AttrClass = plan.get_type(key)
+                self.fields[key] = (_encode_key(key) + ": ",) + self._fast_path(AttrClass)
+        if plan.default_type_spec is not None:
+            self.default_fast_path = self._fast_path(plan.default_type_spec[0])
+
+    def _fast_path(self, AttrClass):
+        if AttrClass in _SCALAR_ENCODERS:
+            return AttrClass, _SCALAR_ENCODERS[AttrClass], False
+        if isinstance(AttrClass, type) and issubclass(AttrClass, StrictDict):
+            return AttrClass, get_encoder(AttrClass).encode, True
+        return None, None, False
+
+    def encode(self, obj, markers=None):
+        if self.lazy:
+            obj.materialize()
+        return self.encode_members(obj, markers)
+
+    def encode_members(self, obj, markers=None):
+        # Encodes any dict of this class's members as it is
+        if markers is None:
+            markers = {id(obj)}
+        fields = self.fields
+        parts = []
+        append = parts.append
+        for key, value in _dict_items(obj):
+            field = fields.get(key)
+            if field is None:
+                field = (_encode_key(key) + ": ",) + (self.default_fast_path or (None, None, False))
+            if type(value) is field[1]:
+                if field[3]:
+                    # A nested StrictDict, marked as _encode_value would
+                    marker = id(value)
+                    if marker in markers:
+                        raise ValueError("Circular reference detected")
+                    markers.add(marker)
+                    append(field[0] + field[2](value, markers))
+                    markers.remove(marker)
+                else:
+                    append(field[0] + field[2](value))
+            else:
+                append(field[0] + _encode_value(value, markers))
+        return "{" + ", ".join(parts) + "}"
+
+
+_encoders = {}
+
+
+def _encode_table(table, markers):
+    # A JSON array with an object per row; tables hold lazy members converted
+    encode_members = get_encoder(table.row_class).encode_members
+    row_dict = table._row_dict
+    return "[" + ", ".join([encode_members(row_dict(index), markers)
+                            for index in range(len(table))]) + "]"
+
+
+def get_encoder(cls):
+    encoder = _encoders.get(cls)
+    if encoder is None:
+        encoder = _encoders[cls] = StrictDictEncoder(cls)
+        encoder.compile()
+    return encoder
+
+
+def default(o):
+    # For json.dumps(obj, default=default): serializes StrictArrays,
+    # StrictRecords and StrictTables
+    if isinstance(o, array.array):
+        return o.tolist()
+    if isinstance(o, StrictRecord):
+        return dict(o.items())
+    if isinstance(o, StrictTable):
+        return [dict(row) for row in o]
+    raise TypeError(repr(o) + " is not JSON serializable")
+
+
+def dumps(obj):
+    return _encode_value(obj, set())
+
+
+def dumpb(obj):
+    return _encode_value(obj, set()).encode("ascii")
+
+
+def dump(obj, fp):
+    # Writes bytes to binary files and buffers, text otherwise
+    if isinstance(fp, (io.RawIOBase, io.BufferedIOBase)) or "b" in getattr(fp, "mode", ""):
+        fp.write(dumpb(obj))
+    else:
+        fp.write(dumps(obj))
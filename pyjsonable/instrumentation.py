@@ -0,0 +1,132 @@
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from pyjsonable.strict_objects import StrictDict
+
+# Opt-in profiling of StrictDict validation. enable() swaps timing wrappers in
+# for the validators on StrictDict itself and disable() puts the originals
+# back, so nothing is measured, and nothing costs extra, while disabled.
+# Validators that a subclass overrides are not wrapped.
+
+ValidatorStats = namedtuple("ValidatorStats", "calls failures seconds")
+
+# StrictDict method -> the rule it is counted under. The batch checks used
+# by __init__ and update() count as the per-member rule they apply.
+INSTRUMENTED_METHODS = (
+    ("validate_required_keys", "validate_required_keys"),
+    ("validate_at_least_one_required_keys", "validate_at_least_one_required_keys"),
+    ("validate_attr_is_allowed", "validate_attr_is_allowed"),
+    ("validate_attr_cannot_coexist", "validate_attr_cannot_coexist"),
+    ("validate_attr_class", "validate_attr_class"),
+    ("_validate_keys_allowed", "validate_attr_is_allowed"),
+    ("_validate_keys_cannot_coexist", "validate_attr_cannot_coexist"),
+    ("_validate_items_class", "validate_attr_class"),
+)
+
+_clock = time.perf_counter
+_lock = threading.Lock()
+# (class, rule) -> [calls, failures, seconds]
+_stats = {}
+_callbacks = []
+_originals = {}
+
+
+class _ThreadState(threading.local):
+    # Set while a validator is being timed, so validators that call each
+    # other are only counted once
+    active = False
+
+_thread_state = _ThreadState()
+
+
+def _record(cls, rule, seconds, failed):
+    with _lock:
+        stats = _stats.get((cls, rule))
+        if stats is None:
+            stats = _stats[(cls, rule)] = [0, 0, 0.0]
+        stats[0] += 1
+        stats[1] += failed
+        stats[2] += seconds
+        callbacks = list(_callbacks)
+    for callback in callbacks:
+        callback(cls, rule, seconds, failed)
+
+
+def _instrument(method, rule):
+    def instrumented(self, *args, **kwargs):
+        if _thread_state.active:
+            return method(self, *args, **kwargs)
+        _thread_state.active = True
+        failed = True
+        start = _clock()
+        try:
+            result = method(self, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            seconds = _clock() - start
+            _thread_state.active = False
+            _record(type(self), rule, seconds, failed)
+    instrumented.__name__ = method.__name__
+    return instrumented
+
+
+def enable():
+    with _lock:
+        if _originals:
+            return
+        for name, rule in INSTRUMENTED_METHODS:
+            _originals[name] = StrictDict.__dict__[name]
+            setattr(StrictDict, name, _instrument(_originals[name], rule))
+
+
+def disable():
+    # Stops measuring; the numbers recorded so far are kept until reset()
+    with _lock:
+        for name, method in _originals.items():
+            setattr(StrictDict, name, method)
+        _originals.clear()
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+@contextmanager
+def instrumented():
+    # Measures validation within the block, unless already enabled
+    was_enabled = is_enabled()
+    enable()
+    try:
+        yield
+    finally:
+        if not was_enabled:
+            disable()
+
+
+def snapshot():
+    # {class: {rule: ValidatorStats}} for every class validated while enabled
+    with _lock:
+        classes = {}
+        for (cls, rule), (calls, failures, seconds) in _stats.items():
+            classes.setdefault(cls, {})[rule] = ValidatorStats(calls, failures, seconds)
+    return classes
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+
+
+def add_callback(callback):
+    # callback(cls, rule, seconds, failed) is called after every measured
+    # validator, e.g. to forward timings to a metrics system
+    with _lock:
+        _callbacks.append(callback)
+
+
+def remove_callback(callback):
+    with _lock:
+        _callbacks.remove(callback)
@@ -0,0 +1,35 @@
+import importlib
+
+# Names shared by the binary format, the schema registry and JSON Patch.
+# Classes are named "module:qualname", and JSON pointers (RFC 6901) escape
+# "~" and "/" in their tokens as "~0" and "~1".
+
+
+def class_name(cls):
+    return cls.__module__ + ":" + cls.__qualname__
+
+
+def import_name(name):
+    # The object named "module:qualname", or None. Its module is imported if
+    # it isn't already, which runs the module's code, so names from untrusted
+    # input must not get here.
+    module_name, _, qualname = name.partition(":")
+    try:
+        found = importlib.import_module(module_name)
+        for attr in qualname.split("."):
+            found = getattr(found, attr)
+    except (ImportError, AttributeError, ValueError):
+        return None
+    return found
+
+
+def escape_token(token):
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_token(token):
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def pointer(tokens):
+    return "".join("/" + escape_token(token) for token in tokens)
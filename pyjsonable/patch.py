@@ -0,0 +1,283 @@
+import array
+import copy
+from collections import namedtuple
+from functools import partial
+
+from pyjsonable import names, strict_objects
+from pyjsonable.strict_objects import StrictDict, StrictList, FrozenStrictDict, _from_raw, _raw_class
+
+# Applies JSON Merge Patch (RFC 7396) and JSON Patch (RFC 6902) documents to
+# StrictDict/StrictList trees in place. Only the members a patch writes are
+# validated, along with the required, at-least-one and cannot-coexist rules
+# of the StrictDicts it changed, so an update costs as much as the patch and
+# not the document. Patches apply all or nothing: on any error every change
+# made so far is undone before the error is raised.
+
+# One applied change. `op` is "add", "replace" or "remove", `path` a JSON
+# pointer, and `old`/`new` are None where there is no value.
+Change = namedtuple("Change", "op path old new")
+
+
+class PatchError(ValueError):
+    # A malformed patch, a path that doesn't exist or a failed "test" op
+    pass
+
+
+_MISSING = object()
+
+
+def _parse_pointer(pointer):
+    if not isinstance(pointer, str) or (pointer and pointer[0] != "/"):
+        raise PatchError("invalid JSON pointer " + repr(pointer))
+    return [names.unescape_token(token) for token in pointer.split("/")[1:]]
+
+
+def _list_index(items, token, tokens, adding=False):
+    if adding and token == "-":
+        return len(items)
+    if not token.isdigit() or (token[0] == "0" and token != "0"):
+        raise PatchError("invalid list index in " + names.pointer(tokens))
+    index = int(token)
+    if index > len(items) or (index == len(items) and not adding):
+        raise PatchError("path " + names.pointer(tokens) + " does not exist")
+    return index
+
+
+def _json_type(value):
+    # bool is checked before int: True is an int in Python but not in JSON
+    if isinstance(value, bool):
+        return bool
+    if isinstance(value, (list, tuple, array.array)):
+        return list
+    if isinstance(value, dict):
+        return dict
+    for json_type in (str, int, float):
+        if isinstance(value, json_type):
+            return json_type
+    return type(value)
+
+
+def _json_equal(value, other):
+    # Equality for the "test" op, where values of different JSON types never
+    # match: 1 is neither true nor 1.0
+    json_type = _json_type(value)
+    if json_type is not _json_type(other):
+        return False
+    if json_type is list:
+        return len(value) == len(other) and all(map(_json_equal, value, other))
+    if json_type is dict:
+        # Item access, so lazy members are converted before comparing
+        return (len(value) == len(other)
+                and all(key in other and _json_equal(value[key], other[key]) for key in value))
+    return value == other
+
+
+def _without_nulls(value):
+    # A merge patch object merged into nothing: its nulls mean "absent"
+    if type(value) is dict:
+        return dict((key, _without_nulls(item)) for key, item in value.items() if item is not None)
+    return value
+
+
+class _Patcher:
+    def __init__(self, log):
+        self.undo = []
+        # id -> StrictDict whose members changed
+        self.touched = {}
+        # id -> (dict, its keys in order) for dicts that had a key removed,
+        # since putting a key back would otherwise move it to the end
+        self.key_orders = {}
+        self.changes = [] if log else None
+        self.checked = not (strict_objects._validation_state.unchecked
+                            and not strict_objects.VERIFY_TRUSTED)
+
+    def log(self, op, tokens, old, new):
+        if self.changes is not None:
+            self.changes.append(Change(op, names.pointer(tokens), old, new))
+
+    def get(self, document, tokens):
+        value = document
+        for depth, token in enumerate(tokens):
+            if isinstance(value, list):
+                value = value[_list_index(value, token, tokens[:depth + 1])]
+            elif isinstance(value, dict):
+                # Item access, so lazy members are converted before use
+                if token not in value:
+                    raise PatchError("path " + names.pointer(tokens[:depth + 1]) + " does not exist")
+                value = value[token]
+            else:
+                raise PatchError("path " + names.pointer(tokens[:depth + 1]) + " does not exist")
+        return value
+
+    def container(self, document, tokens):
+        container = self.get(document, tokens)
+        if isinstance(container, FrozenStrictDict):
+            raise TypeError(container.get_class_name() + " is immutable")
+        if not isinstance(container, (dict, list)):
+            raise PatchError("cannot patch inside " + type(container).__name__ + " at "
+                             + names.pointer(tokens))
+        return container
+
+    def new_value(self, container, key, value):
+        # Plain dicts and lists for StrictDict/StrictList members are
+        # converted, which validates the new subtree, then the member is
+        # checked like StrictDict.__setitem__ does
+        if isinstance(container, StrictDict):
+            plan = container._plan
+            if key not in plan.lazy_types:
+                RawClass = _raw_class(plan.get_type(key), value)
+                if RawClass is not None:
+                    value = _from_raw(RawClass, value)
+            if self.checked:
+                container.validate_attr_is_allowed(attr=key, value=value)
+                container.validate_attr_class(attr=key, value=value)
+            self.touched[id(container)] = container
+        elif isinstance(container, StrictList):
+            RawClass = _raw_class(container._item_type, value)
+            if RawClass is not None:
+                value = _from_raw(RawClass, value)
+            if self.checked:
+                container._validate_item(value)
+        return value
+
+    def set(self, container, key, value, tokens):
+        # Adds or replaces a dict member
+        value = self.new_value(container, key, value)
+        old = dict.get(container, key, _MISSING)
+        if old is _MISSING:
+            self.undo.append(partial(dict.__delitem__, container, key))
+        else:
+            self.undo.append(partial(dict.__setitem__, container, key, old))
+        dict.__setitem__(container, key, value)
+        self.log("add" if old is _MISSING else "replace", tokens, None if old is _MISSING else old, value)
+
+    def set_item(self, items, index, value, tokens):
+        value = self.new_value(items, index, value)
+        old = items[index]
+        self.undo.append(partial(list.__setitem__, items, index, old))
+        list.__setitem__(items, index, value)
+        self.log("replace", tokens, old, value)
+
+    def insert(self, items, index, value, tokens):
+        value = self.new_value(items, index, value)
+        self.undo.append(partial(list.__delitem__, items, index))
+        list.insert(items, index, value)
+        self.log("add", tokens[:-1] + [index], None, value)
+
+    def remove(self, container, key, tokens):
+        if isinstance(container, list):
+            old = list.pop(container, key)
+            self.undo.append(partial(list.insert, container, key, old))
+        else:
+            if id(container) not in self.key_orders:
+                self.key_orders[id(container)] = (container, list(dict.keys(container)))
+            old = dict.pop(container, key)
+            self.undo.append(partial(dict.__setitem__, container, key, old))
+            if isinstance(container, StrictDict):
+                self.touched[id(container)] = container
+        self.log("remove", tokens, old, None)
+
+    def merge(self, target, patch, tokens):
+        if isinstance(target, FrozenStrictDict):
+            raise TypeError(target.get_class_name() + " is immutable")
+        for key, value in patch.items():
+            if value is None:
+                if key in target:
+                    self.remove(target, key, tokens + [key])
+            elif type(value) is dict and isinstance(dict.get(target, key), dict):
+                self.merge(target[key], value, tokens + [key])
+            else:
+                self.set(target, key, _without_nulls(value), tokens + [key])
+
+    def apply(self, document, operation):
+        try:
+            op = operation["op"]
+            tokens = _parse_pointer(operation["path"])
+            if op in ("add", "replace", "test"):
+                value = operation["value"]
+            elif op in ("move", "copy"):
+                from_tokens = _parse_pointer(operation["from"])
+        except (KeyError, TypeError):
+            raise PatchError("invalid operation " + repr(operation))
+
+        if op == "test":
+            if not _json_equal(self.get(document, tokens), value):
+                raise PatchError("test failed at " + operation["path"])
+            return
+        if op not in ("add", "remove", "replace", "move", "copy"):
+            raise PatchError("unknown operation " + repr(op))
+        if not tokens:
+            raise PatchError("cannot " + op + " the document root")
+        if op == "move":
+            if tokens[:len(from_tokens)] == from_tokens and tokens != from_tokens:
+                raise PatchError("cannot move " + operation["from"] + " into itself")
+            value = self.get(document, from_tokens)
+            parent = self.container(document, from_tokens[:-1])
+            key = from_tokens[-1]
+            self.remove(parent, _list_index(parent, key, from_tokens) if isinstance(parent, list) else key,
+                        from_tokens)
+            op = "add"
+        elif op == "copy":
+            value = copy.deepcopy(self.get(document, from_tokens))
+            op = "add"
+
+        parent = self.container(document, tokens[:-1])
+        key = tokens[-1]
+        if isinstance(parent, list):
+            index = _list_index(parent, key, tokens, adding=op == "add")
+            if op == "add":
+                self.insert(parent, index, value, tokens)
+            elif op == "replace":
+                self.set_item(parent, index, value, tokens)
+            else:
+                self.remove(parent, index, tokens)
+        else:
+            if op != "add" and key not in parent:
+                raise PatchError("path " + operation["path"] + " does not exist")
+            if op == "remove":
+                self.remove(parent, key, tokens)
+            else:
+                self.set(parent, key, value, tokens)
+
+    def finish(self):
+        # The rules that depend on a StrictDict's other members
+        for container in self.touched.values():
+            container._count_coexist_keys()
+            if self.checked:
+                container.validate_required_keys(container)
+                container.validate_at_least_one_required_keys(container)
+                if container._coexist_count > 1:
+                    raise AttributeError(container._plan.cannot_coexist_message())
+
+    def rollback(self):
+        for undo in reversed(self.undo):
+            undo()
+        for container, keys in self.key_orders.values():
+            # Keys the patch added were removed again by the undos above
+            items = [(key, dict.__getitem__(container, key)) for key in keys if key in container]
+            dict.clear(container)
+            dict.update(container, items)
+        for container in self.touched.values():
+            container._count_coexist_keys()
+
+
+def apply_patch(document, patch, log=False):
+    # Applies `patch` to `document` in place: a list of JSON Patch operations,
+    # or a dict for a merge patch. With log=True, returns the list of Changes
+    # made, in order.
+    patcher = _Patcher(log)
+    try:
+        if isinstance(patch, list):
+            for operation in patch:
+                patcher.apply(document, operation)
+        elif isinstance(patch, dict):
+            if not isinstance(document, dict):
+                raise PatchError("a merge patch needs a dict to patch")
+            patcher.merge(document, patch, [])
+        else:
+            raise PatchError("a patch is a list of operations or a merge patch dict")
+        patcher.finish()
+    except BaseException:
+        patcher.rollback()
+        raise
+    return patcher.changes
@@ -0,0 +1,462 @@
+import atexit
+import os
+import pickle
+import sys
+import typing
+from itertools import combinations
+
+from pyjsonable import strict_objects
+from pyjsonable.names import class_name, escape_token, import_name, unescape_token
+from pyjsonable.strict_objects import StrictDict, StrictList, ValidationPlan, _compile_annotation, _is_any
+
+# Every StrictDict/StrictList subclass, their schemas as JSON Schema, and an
+# on-disk cache of compiled ValidationPlans for fast process start.
+#
+# Classes are not registered as they are defined: Python already tracks
+# subclasses, so the registry walks them when asked and defining a class
+# costs nothing extra. Classes are named "module:qualname" like in the
+# binary format.
+#
+# The plan cache keeps the plans of annotated classes with their type hints
+# already resolved, which is most of what compiling one costs; a plan from
+# Meta alone compiles faster than it unpickles, so those are not cached.
+# Entries are keyed by the modification time and size of the files of every
+# module in the class's MRO, so editing any of them recompiles the plan. A
+# plan whose annotations use type aliases from other modules is not
+# invalidated when only those modules change; delete the cache file after
+# such changes.
+
+JSON_SCHEMA_DIALECT = "https://json-schema.org/draft/2020-12/schema"
+
+_CACHE_FORMAT = 1
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    type(None): "null",
+    list: "array",
+    tuple: "array",
+    set: "array",
+    frozenset: "array",
+    dict: "object",
+}
+
+_PYTHON_TYPES = {
+    "string": str,
+    "integer": int,
+    "number": float,
+    "boolean": bool,
+    "null": type(None),
+    "array": list,
+    "object": dict,
+}
+
+
+def _is_derived(cls):
+    # frozen_type() classes are named after, and described by, their source
+    return "_frozen_from" in vars(cls)
+
+
+def classes():
+    # Every StrictDict and StrictList subclass defined so far, by name
+    found = []
+    seen = set()
+    pending = [StrictDict, StrictList]
+    while pending:
+        for cls in pending.pop().__subclasses__():
+            if cls not in seen:
+                seen.add(cls)
+                pending.append(cls)
+                if not _is_derived(cls):
+                    found.append(cls)
+    return sorted(found, key=class_name)
+
+
+def get(name):
+    # The class named "module:qualname", or None
+    for cls in classes():
+        if class_name(cls) == name:
+            return cls
+    return None
+
+
+def _any_of(schemas):
+    if {} in schemas:
+        return {}
+    if all(list(schema) == ["type"] for schema in schemas):
+        json_types = []
+        for schema in schemas:
+            for json_type in (schema["type"] if isinstance(schema["type"], list) else [schema["type"]]):
+                if json_type not in json_types:
+                    json_types.append(json_type)
+        return {"type": json_types[0] if len(json_types) == 1 else json_types}
+    return {"anyOf": schemas}
+
+
+class _Exporter:
+    def __init__(self):
+        # name -> schema of every class referenced so far
+        self.defs = {}
+
+    def ref(self, cls):
+        if _is_derived(cls):
+            cls = cls._frozen_from
+        name = class_name(cls)
+        if name not in self.defs:
+            self.defs[name] = None
+            self.defs[name] = self.class_schema(cls)
+        return {"$ref": "#/$defs/" + escape_token(name)}
+
+    def class_schema(self, cls):
+        if issubclass(cls, StrictList):
+            schema = {"title": cls.__name__, "type": "array"}
+            items = self.hint(cls._item_type)
+            if items:
+                schema["items"] = items
+            return schema
+
+        plan = cls._plan
+        properties = {}
+        # JSON object members are strings, so other keys are left out
+        for key in sorted(key for key in plan.declared_keys if isinstance(key, str)):
+            properties[key] = self.member(plan, key)
+            if key in plan.lazy_types:
+                properties[key]["x-lazy"] = True
+        schema = {"title": cls.__name__, "type": "object", "properties": properties}
+        required = sorted(key for key in plan.required_keys if isinstance(key, str))
+        if required:
+            schema["required"] = required
+        if plan.at_least_one_required_keys:
+            schema["anyOf"] = [{"required": [key]} for key in sorted(plan.at_least_one_required_keys)]
+        if len(plan.cannot_coexist_keys) > 1:
+            schema["not"] = {"anyOf": [{"required": list(pair)}
+                                       for pair in combinations(sorted(plan.cannot_coexist_keys), 2)]}
+        if plan.allowed_keys is not None:
+            schema["additionalProperties"] = False
+        elif plan.default_type_spec is not None:
+            schema["additionalProperties"] = self.hint(plan.default_type_spec[0])
+        return schema
+
+    def member(self, plan, key):
+        if key in plan.type_hints:
+            return self.hint(plan.type_hints[key])
+        spec = plan.type_specs.get(key)
+        if spec is None:
+            return {}
+        AttrClass, nullable = spec
+        schema = self.hint(AttrClass)
+        if nullable:
+            schema = _any_of([schema, {"type": "null"}])
+        return schema
+
+    def hint(self, hint):
+        # JSON Schema for a Meta.item_type entry or an annotation
+        if isinstance(hint, tuple):
+            return _any_of([self.hint(Class) for Class in hint])
+        if _is_any(hint) or hint is object:
+            return {}
+        origin = getattr(hint, "__origin__", None)
+        args = getattr(hint, "__args__", ())
+        if origin is None and isinstance(hint, type):
+            if issubclass(hint, (StrictDict, StrictList)):
+                return self.ref(hint)
+            json_type = _JSON_TYPES.get(hint)
+            if json_type is None:
+                return {"x-python-type": hint.__module__ + ":" + hint.__qualname__}
+            schema = {"type": json_type}
+            if hint in (set, frozenset):
+                schema["uniqueItems"] = True
+            return schema
+
+        if origin is typing.Union or isinstance(hint, strict_objects._UnionType):
+            return _any_of([self.hint(arg) for arg in args])
+        if origin in (list, set, frozenset) or (origin is tuple and (not args or args[-1] is Ellipsis)):
+            schema = self.hint(origin)
+            items = self.hint(args[0]) if args else {}
+            if items:
+                schema["items"] = items
+            return schema
+        if origin is tuple:
+            if args == ((),):
+                args = ()
+            return {
+                "type": "array",
+                "prefixItems": [self.hint(arg) for arg in args],
+                "items": False,
+                "minItems": len(args),
+                "maxItems": len(args),
+            }
+        if origin is dict:
+            schema = {"type": "object"}
+            values = self.hint(args[1]) if args else {}
+            if values:
+                schema["additionalProperties"] = values
+            return schema
+        raise TypeError("unsupported annotation " + str(hint))
+
+
+def json_schema(cls):
+    # A JSON Schema document for one StrictDict/StrictList subclass, with
+    # every class it refers to under "$defs"
+    exporter = _Exporter()
+    ref = exporter.ref(cls)
+    return {"$schema": JSON_SCHEMA_DIALECT, "$ref": ref["$ref"], "$defs": exporter.defs}
+
+
+def export_schemas(classes_to_export=None):
+    # One JSON Schema document with every registered class, or the given
+    # ones, under "$defs"
+    exporter = _Exporter()
+    for cls in classes() if classes_to_export is None else classes_to_export:
+        exporter.ref(cls)
+    return {"$schema": JSON_SCHEMA_DIALECT, "$defs": exporter.defs}
+
+
+class _Importer:
+    def __init__(self, document):
+        self.defs = document.get("$defs", {})
+        # name -> class built from its schema
+        self.classes = {}
+        self.building = set()
+
+    def ref(self, ref):
+        if not ref.startswith("#/$defs/") or unescape_token(ref[8:]) not in self.defs:
+            raise ValueError("unsupported $ref " + ref)
+        name = unescape_token(ref[8:])
+        return self.build(name, self.defs[name])
+
+    def build(self, name, schema):
+        cls = self.classes.get(name)
+        if cls is not None:
+            return cls
+        if name in self.building:
+            raise ValueError("recursive schema " + name + " is not supported")
+        self.building.add(name)
+        if ":" in name:
+            module_name, _, qualname = name.partition(":")
+        else:
+            module_name, qualname = __name__, schema.get("title", name)
+        namespace = {"__module__": module_name, "__qualname__": qualname}
+
+        if schema.get("type") == "array":
+            item_type = self.hint(schema.get("items", {}))
+            namespace["Meta"] = type("Meta", (), {
+                "item_type": object if _is_any(item_type) else _compile_annotation(item_type)[0],
+            })
+            Base = StrictList
+        else:
+            properties = schema.get("properties", {})
+            annotations = {}
+            for key, member in properties.items():
+                hint = self.hint(member)
+                if not _is_any(hint):
+                    annotations[key] = hint
+            meta = {
+                "required_keys": set(schema.get("required", ())),
+                "at_least_one_required_keys": set(key for rule in schema.get("anyOf", ())
+                                                  for key in rule.get("required", ())),
+                "cannot_coexist_keys": set(key for rule in schema.get("not", {}).get("anyOf", ())
+                                           for key in rule.get("required", ())),
+                "lazy_keys": [key for key, member in properties.items() if member.get("x-lazy")],
+            }
+            additional = schema.get("additionalProperties", True)
+            if additional is False:
+                meta["allowed_keys"] = set(properties)
+            elif isinstance(additional, dict) and not annotations:
+                item_type = self.hint(additional)
+                if not _is_any(item_type):
+                    meta["item_type"] = _compile_annotation(item_type)[0]
+            namespace["Meta"] = type("Meta", (), meta)
+            namespace["__annotations__"] = annotations
+            Base = StrictDict
+        cls = self.classes[name] = type(qualname.rpartition(".")[2], (Base,), namespace)
+        self.building.discard(name)
+        return cls
+
+    def hint(self, schema):
+        # The annotation a member's schema compiles to
+        if schema is True or not isinstance(schema, dict):
+            return typing.Any
+        if "$ref" in schema:
+            return self.ref(schema["$ref"])
+        if "x-python-type" in schema:
+            found = import_name(schema["x-python-type"])
+            return found if isinstance(found, type) else typing.Any
+        if "anyOf" in schema:
+            members = [self.hint(member) for member in schema["anyOf"]]
+            if any(_is_any(member) for member in members):
+                return typing.Any
+            return typing.Union[tuple(members)]
+        json_type = schema.get("type")
+        if json_type is None:
+            return typing.Any
+        if isinstance(json_type, list):
+            return typing.Union[tuple(self.hint(dict(schema, type=member)) for member in json_type)]
+        if json_type == "array":
+            if "prefixItems" in schema:
+                members = tuple(self.hint(member) for member in schema["prefixItems"])
+                return typing.Tuple[members or ((),)]
+            items = self.hint(schema.get("items", {}))
+            if schema.get("uniqueItems"):
+                return set if _is_any(items) else typing.Set[items]
+            return list if _is_any(items) else typing.List[items]
+        if json_type == "object":
+            values = self.hint(schema.get("additionalProperties", {}))
+            return dict if _is_any(values) else typing.Dict[str, values]
+        if json_type not in _PYTHON_TYPES:
+            raise ValueError("unsupported schema type " + repr(json_type))
+        return _PYTHON_TYPES[json_type]
+
+
+def from_json_schema(document):
+    # Builds a StrictDict/StrictList subclass for every schema under
+    # "$defs", or for the document itself when it has none, and returns them
+    # by name. Classes keep the "module:qualname" they were exported under,
+    # so the binary format and the plan cache match them to the originals.
+    # Members typed by other Python classes ("x-python-type") are imported
+    # by name, which runs the code of the modules they name: only pass
+    # documents from trusted sources.
+    importer = _Importer(document)
+    if "$defs" not in document:
+        name = document.get("title", "Schema")
+        return {name: importer.build(name, document)}
+    for name, schema in importer.defs.items():
+        importer.build(name, schema)
+    return importer.classes
+
+
+# Per process: module name -> (file, mtime, size), or None if it has no file
+_module_stamps = {}
+
+
+def _module_stamp(module_name):
+    try:
+        return _module_stamps[module_name]
+    except KeyError:
+        pass
+    stamp = None
+    path = getattr(sys.modules.get(module_name), "__file__", None)
+    if path:
+        try:
+            stat = os.stat(path)
+            stamp = (path, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+    _module_stamps[module_name] = stamp
+    return stamp
+
+
+def _source_stamp(cls):
+    # None for classes that are not cached: ones without annotations, and
+    # ones defined in a function or built at runtime
+    if "<locals>" in cls.__qualname__ or not any("__annotations__" in vars(base) for base in cls.__mro__):
+        return None
+    stamps = []
+    for module_name in dict.fromkeys(base.__module__ for base in cls.__mro__):
+        if module_name == "builtins":
+            continue
+        stamp = _module_stamp(module_name)
+        if stamp is None:
+            return None
+        stamps.append(stamp)
+    return (sys.version_info[:2], tuple(stamps))
+
+
+class _PlanCache:
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        self.hits = self.misses = 0
+        # name -> (source stamp, pickled plan). Plans stay pickled until
+        # their class asks for them, so loading the cache imports nothing.
+        self.entries = {}
+        try:
+            with open(path, "rb") as fp:
+                cache_format, entries = pickle.load(fp)
+            if cache_format == _CACHE_FORMAT:
+                self.entries = entries
+        except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+            pass
+
+    def plan(self, cls):
+        stamp = _source_stamp(cls)
+        if stamp is None:
+            return ValidationPlan(cls)
+        name = class_name(cls)
+        entry = self.entries.get(name)
+        if entry is not None and entry[0] == stamp:
+            try:
+                plan = pickle.loads(entry[1])
+                self.hits += 1
+                return plan
+            except (EOFError, ValueError, TypeError, AttributeError, ImportError, pickle.UnpicklingError):
+                pass
+        self.misses += 1
+        plan = ValidationPlan(cls)
+        try:
+            self.entries[name] = (stamp, pickle.dumps(plan, pickle.HIGHEST_PROTOCOL))
+            self.dirty = True
+        except (TypeError, AttributeError, pickle.PicklingError):
+            # Members typed by classes pickle can't find by name
+            pass
+        return plan
+
+    def save(self):
+        if not self.dirty:
+            return
+        # Written next to the cache and renamed over it, so processes
+        # starting at the same time never read a partial file
+        temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+        try:
+            with open(temp_path, "wb") as fp:
+                pickle.dump((_CACHE_FORMAT, self.entries), fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self.dirty = False
+
+
+_plan_cache = None
+_saves_at_exit = False
+
+
+def enable_plan_cache(path):
+    # Reads the plans of StrictDict subclasses defined from now on from the
+    # cache file at `path`, compiling and adding the ones that are missing
+    # or stale. New plans are written back at exit or by save_plan_cache().
+    # Setting PYJSONABLE_PLAN_CACHE to a path does this on import.
+    global _plan_cache, _saves_at_exit
+    _plan_cache = _PlanCache(path)
+    strict_objects._plan_loader = _plan_cache.plan
+    if not _saves_at_exit:
+        atexit.register(_save_at_exit)
+        _saves_at_exit = True
+
+
+def disable_plan_cache():
+    global _plan_cache
+    _plan_cache = None
+    strict_objects._plan_loader = None
+
+
+def save_plan_cache():
+    if _plan_cache is not None:
+        _plan_cache.save()
+
+
+def plan_cache_info():
+    # (hits, misses) of the enabled plan cache, or None
+    if _plan_cache is None:
+        return None
+    return _plan_cache.hits, _plan_cache.misses
+
+
+def _save_at_exit():
+    try:
+        save_plan_cache()
+    except OSError:
+        pass
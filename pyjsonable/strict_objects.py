@@ -1,3 +1,691 @@
+__author__ = 'vayner'
+
+import array
+import copy
+import copyreg
+import os
+import re
+import threading
+import types
+import typing
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import partial
+from collections.abc import Mapping
+from operator import attrgetter
+
+# Re-enables full validation for trusted() and unchecked() so those paths can
+# be audited, e.g. in staging. Read at call time, so it can also be flipped.
+VERIFY_TRUSTED = os.environ.get("PYJSONABLE_VERIFY_TRUSTED", "") not in ("", "0")
+
+# Defers compiling each StrictDict subclass's Meta until the class is first
+# used, so importing many schemas is cheap. Class definition errors are then
+# raised on first use instead of at import. Read when a class is defined.
+LAZY_PLANS = os.environ.get("PYJSONABLE_LAZY_PLANS", "") not in ("", "0")
+
+
+class _ValidationState(threading.local):
+    unchecked = 0
+
+_validation_state = _ValidationState()
+
+
+@contextmanager
+def unchecked():
+    # Skips StrictDict validation for the current thread within the block
+    _validation_state.unchecked += 1
+    try:
+        yield
+    finally:
+        _validation_state.unchecked -= 1
+
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Read StrictDict members as stored, without converting lazy members
+_dict_getitem = dict.__getitem__
+_dict_items = dict.items
+
+# Values copy.deepcopy() shares rather than copies
+_IMMUTABLE_TYPES = frozenset((str, int, float, bool, complex, bytes, type(None)))
+
+
+def _deepcopy_items(items, memo):
+    return [value if type(value) in _IMMUTABLE_TYPES else copy.deepcopy(value, memo) for value in items]
+
+
+def _format_keys(keys):
+    return str([str(key) for key in keys])
+
+
+CacheInfo = namedtuple("CacheInfo", "hits misses evictions maxsize currsize")
+
+# Values that can be part of a validation cache key. Anything else, including
+# every mutable value, makes the input uncacheable.
+_CACHEABLE_TYPES = frozenset((type(None), bool, int, float, str, bytes))
+
+
+def _canonical_value(value):
+    value_type = type(value)
+    if value_type in _CACHEABLE_TYPES:
+        return value_type, value
+    if value_type is tuple or value_type is frozenset:
+        canonical = [_canonical_value(item) for item in value]
+        if None in canonical:
+            return None
+        return value_type, value_type(canonical)
+    return None
+
+
+class ValidationCache:
+    # LRU cache of inputs that passed validation. Keys are the input's items
+    # in order plus the exact type of every value, so that e.g. 1, 1.0 and
+    # True never share an entry; the same items in another order are simply
+    # a separate entry.
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key_for(self, mapping):
+        value_types = tuple(map(type, dict.values(mapping)))
+        if _CACHEABLE_TYPES.issuperset(value_types):
+            return tuple(dict.items(mapping)), value_types
+        items = []
+        for key, value in _dict_items(mapping):
+            canonical = _canonical_value(value)
+            if canonical is None:
+                return None
+            items.append((key, canonical))
+        return "canonical", tuple(items)
+
+    def get(self, key):
+        entries = self._entries
+        value = entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        try:
+            entries.move_to_end(key)
+        except KeyError:
+            # Evicted by another thread in the meantime
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+def _type_check(AttrClass, nullable=False):
+    # Builds the isinstance check for a single item_type entry
+    if nullable:
+        def check(value):
+            return value is None or isinstance(value, AttrClass)
+    else:
+        def check(value):
+            return isinstance(value, AttrClass)
+    return check
+
+
+def _nullable_check(check):
+    def nullable_check(value):
+        return value is None or check(value)
+    return nullable_check
+
+
+_UnionType = getattr(types, "UnionType", ())
+
+
+def _field_annotations(cls):
+    # Class annotations from cls and its bases, with ClassVars left out
+    if not any("__annotations__" in vars(base) for base in cls.__mro__):
+        return {}
+    try:
+        # The class name isn't bound yet, so it is passed for schemas that
+        # refer to themselves
+        hints = typing.get_type_hints(cls, localns={cls.__name__: cls})
+    except NameError as error:
+        raise TypeError(cls.__name__ + " has an annotation that cannot be resolved: " + str(error))
+    return dict((attr, hint) for attr, hint in hints.items()
+                if getattr(hint, "__origin__", None) is not typing.ClassVar)
+
+
+def _is_any(hint):
+    return hint is typing.Any or isinstance(hint, typing.TypeVar)
+
+
+def _compile_annotation(hint):
+    # An annotation as (AttrClass, nullable, check), where AttrClass and
+    # nullable mean what they do in Meta.item_type. check is None when
+    # isinstance against AttrClass says it all, otherwise it also checks
+    # container elements.
+    if _is_any(hint):
+        return object, False, None
+    origin = getattr(hint, "__origin__", None)
+    args = getattr(hint, "__args__", ())
+    if origin is None and isinstance(hint, type):
+        return hint, False, None
+
+    if origin is typing.Union or isinstance(hint, _UnionType):
+        members = [_compile_annotation(arg) for arg in args if arg is not type(None)]
+        nullable = len(members) < len(args)
+        if len(members) == 1:
+            AttrClass, member_nullable, check = members[0]
+        else:
+            AttrClass = tuple(Class for member in members for Class in _classes(member[0]))
+            check = None
+            if any(member[2] is not None for member in members):
+                check = _any_check(tuple(member[2] or _type_check(member[0]) for member in members))
+        if check is not None and nullable:
+            check = _nullable_check(check)
+        return AttrClass, nullable, check
+
+    if origin in (list, set, frozenset):
+        return origin, False, _container_check(origin, _elements_check(args[0] if args else typing.Any))
+    if origin is tuple:
+        if not args or (len(args) == 2 and args[1] is Ellipsis):
+            return tuple, False, _container_check(tuple, _elements_check(args[0] if args else typing.Any))
+        return tuple, False, _fixed_tuple_check(args)
+    if origin is dict:
+        keys_match = _elements_check(args[0] if args else typing.Any)
+        values_match = _elements_check(args[1] if args else typing.Any)
+        if keys_match is None and values_match is None:
+            return dict, False, None
+        keys_match = keys_match or _no_check
+        values_match = values_match or _no_check
+
+        def check(value):
+            return isinstance(value, dict) and keys_match(value.keys()) and values_match(value.values())
+        return dict, False, check
+    raise TypeError("unsupported annotation " + str(hint))
+
+
+def _any_check(checks):
+    def check(value):
+        for member_check in checks:
+            if member_check(value):
+                return True
+        return False
+    return check
+
+
+def _no_check(values):
+    return True
+
+
+def _elements_check(hint):
+    # A check that every value in a collection matches hint, or None if any
+    # value does. Plain classes check each distinct type once.
+    AttrClass, nullable, check = _compile_annotation(hint)
+    if check is None and not nullable:
+        if AttrClass is object:
+            return None
+
+        def elements_match(values):
+            return _first_invalid_item(values, AttrClass) is None
+        return elements_match
+    check = check or _type_check(AttrClass, nullable)
+
+    def elements_match(values):
+        for value in values:
+            if not check(value):
+                return False
+        return True
+    return elements_match
+
+
+def _container_check(Container, elements_match):
+    if elements_match is None:
+        return None
+
+    def check(value):
+        return isinstance(value, Container) and elements_match(value)
+    return check
+
+
+def _fixed_tuple_check(args):
+    if args == ((),):
+        # Tuple[()] before Python 3.11
+        args = ()
+    checks = []
+    for arg in args:
+        AttrClass, nullable, check = _compile_annotation(arg)
+        checks.append(check or _type_check(AttrClass, nullable))
+    checks = tuple(checks)
+
+    def check(value):
+        if not isinstance(value, tuple) or len(value) != len(checks):
+            return False
+        for item_check, item in zip(checks, value):
+            if not item_check(item):
+                return False
+        return True
+    return check
+
+
+def _classes(AttrClass):
+    if isinstance(AttrClass, tuple):
+        return AttrClass
+    return (AttrClass,)
+
+
+def _class_in(AttrClass, Base):
+    # The first subclass of Base in AttrClass, a class or tuple of classes
+    for Class in _classes(AttrClass):
+        if isinstance(Class, type) and issubclass(Class, Base):
+            return Class
+    return None
+
+
+def _raw_class(AttrClass, value):
+    # The StrictDict, StrictList or StrictArray subclass in AttrClass that
+    # `value`, a plain dict or list such as decoded JSON, would be converted to
+    if type(value) is dict:
+        return _class_in(AttrClass, StrictDict)
+    if type(value) is list:
+        return _class_in(AttrClass, (StrictList, StrictArray))
+    return None
+
+
+def _lazy_check(check, AttrClass):
+    # A lazy key also holds the plain dict/list its value is built from
+    def lazy_check(value):
+        return check(value) or _raw_class(AttrClass, value) is not None
+    return lazy_check
+
+
+def _from_raw(Class, value):
+    # Builds Class from a plain dict/list, converting the plain values of its
+    # nested StrictDict/StrictList members as well. Lazy keys of the new
+    # object stay plain until they are read.
+    if issubclass(Class, StrictArray):
+        return Class(*value)
+    if issubclass(Class, StrictDict):
+        plan = Class._plan
+        items = dict(value)
+        for key in items:
+            if key not in plan.lazy_types:
+                NestedClass = _raw_class(plan.get_type(key), items[key])
+                if NestedClass is not None:
+                    items[key] = _from_raw(NestedClass, items[key])
+        return Class(items)
+    item_type = Class._item_type
+    items = list(value)
+    for index, item in enumerate(items):
+        NestedClass = _raw_class(item_type, item)
+        if NestedClass is not None:
+            items[index] = _from_raw(NestedClass, item)
+    return Class(*items)
+
+
+class ValidationPlan:
+    # A StrictDict subclass's Meta compiled into frozensets and a per-key
+    # validator table. Error messages are only built when a check fails.
+
+    def __init__(self, cls):
+        Meta = cls.Meta
+        self.class_name = cls.__name__
+        self.required_keys = frozenset(getattr(Meta, "required_keys", ()))
+        self.at_least_one_required_keys = frozenset(
+            getattr(Meta, "at_least_one_required_keys", ()))
+        self.cannot_coexist_keys = frozenset(getattr(Meta, "cannot_coexist_keys", ()))
+
+        # Opt-in memoization of inputs that passed validation
+        self.validation_cache = None
+        validation_cache_size = getattr(Meta, "validation_cache_size", None)
+        if validation_cache_size:
+            self.validation_cache = ValidationCache(validation_cache_size)
+
+        # None means any member is allowed
+        self.allowed_keys = None
+        allowed_keys = getattr(Meta, "allowed_keys", None)
+        if allowed_keys:
+            self.allowed_keys = frozenset(allowed_keys)\
+                .union(self.required_keys)\
+                .union(self.at_least_one_required_keys)\
+                .union(self.cannot_coexist_keys)
+
+        self.declared_keys = (self.allowed_keys or frozenset())\
+            .union(self.required_keys)\
+            .union(self.at_least_one_required_keys)\
+            .union(self.cannot_coexist_keys)
+
+        # key -> (AttrClass, nullable), and the compiled check for each key
+        self.type_specs = {}
+        self.validators = {}
+        self.validator_items = ()
+        self.default_type_spec = None
+        self.default_validator = None
+        # key -> annotation, for annotated keys whose check goes beyond
+        # isinstance, so error messages can show it
+        self.type_hints = {}
+        # key -> AttrClass for Meta.lazy_keys, whose plain dict/list values
+        # are only converted and validated when first read
+        self.lazy_types = {}
+        item_type = getattr(Meta, "item_type", None)
+        lazy_keys = getattr(Meta, "lazy_keys", ())
+        annotations = _field_annotations(cls)
+        hint_checks = {}
+
+        # Case where a single type is declared for all dict values
+        if item_type and not isinstance(item_type, dict):
+            if lazy_keys or annotations:
+                raise TypeError(self.class_name + " lazy_keys and annotations need item_type"
+                    + " to be a dict, if set")
+            self.default_type_spec = (item_type, False)
+            self._compile_validators()
+            return
+
+        for attr, mapped_item_type in (item_type or {}).items():
+            if isinstance(mapped_item_type, dict):
+                # Case where a complex dict with members "type" and "nullable" is declared
+                spec = (mapped_item_type.get("type"), mapped_item_type.get("nullable", False))
+            else:
+                spec = (mapped_item_type, False)
+            self.type_specs[attr] = spec
+
+        # Case where members are declared as class annotations. These compile
+        # to the same (AttrClass, nullable) specs, and are allowed members.
+        own_annotations = vars(cls).get("__annotations__", {})
+        for attr, hint in annotations.items():
+            # A class attribute would shadow the member's dot access
+            if attr in own_annotations and not isinstance(vars(cls).get(attr, property()), property):
+                raise TypeError(self.class_name + " member '" + str(attr) + "' cannot have a default value")
+            if attr in self.type_specs:
+                raise TypeError(self.class_name + " member '" + str(attr) + "'"
+                    + " is typed by both Meta.item_type and an annotation")
+            try:
+                AttrClass, nullable, check = _compile_annotation(hint)
+            except TypeError as error:
+                raise TypeError(self.class_name + " member '" + str(attr) + "' has an " + str(error))
+            self.type_specs[attr] = (AttrClass, nullable)
+            if check is not None:
+                self.type_hints[attr] = hint
+                hint_checks[attr] = check
+        if annotations and self.allowed_keys is not None:
+            self.allowed_keys = self.allowed_keys.union(annotations)
+            self.declared_keys = self.declared_keys.union(annotations)
+
+        for attr in lazy_keys:
+            if attr not in self.type_specs:
+                raise TypeError(self.class_name + " lazy key '" + str(attr) + "' needs a declared type")
+            AttrClass = self.get_type(attr)
+            if not any(isinstance(Class, type) and issubclass(Class, (StrictDict, StrictList))
+                       for Class in _classes(AttrClass)):
+                raise TypeError(self.class_name + " lazy key '" + str(attr) + "'"
+                    + " must be of a StrictDict or StrictList type")
+            self.lazy_types[attr] = AttrClass
+        self.declared_keys = self.declared_keys.union(self.type_specs)
+        self._compile_validators(hint_checks)
+
+    def _compile_validators(self, hint_checks=None):
+        # The checks are closures, so they are rebuilt from the specs rather
+        # than pickled with the rest of the plan. hint_checks has the ones
+        # already compiled from type_hints.
+        if self.default_type_spec is not None:
+            self.default_validator = _type_check(*self.default_type_spec)
+            return
+        validators = {}
+        for attr, spec in self.type_specs.items():
+            if attr in self.type_hints:
+                check = (hint_checks or {}).get(attr) or _compile_annotation(self.type_hints[attr])[2]
+            else:
+                check = _type_check(*spec)
+            if attr in self.lazy_types:
+                check = _lazy_check(check, self.lazy_types[attr])
+            validators[attr] = check
+        self.validators = validators
+        self.validator_items = tuple(validators.items())
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["validators"], state["validator_items"], state["default_validator"]
+        if self.validation_cache is not None:
+            state["validation_cache"] = self.validation_cache.maxsize
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.validators = {}
+        self.validator_items = ()
+        self.default_validator = None
+        if self.validation_cache is not None:
+            self.validation_cache = ValidationCache(self.validation_cache)
+        self._compile_validators()
+
+    def get_type(self, attr):
+        # The declared AttrClass (a type or tuple of types) for attr, if any
+        spec = self.default_type_spec or self.type_specs.get(attr)
+        if spec is not None:
+            return spec[0]
+
+    def get_validator(self, attr):
+        if self.default_validator is not None:
+            return self.default_validator
+        return self.validators.get(attr)
+
+    def required_keys_message(self):
+        return self.class_name + " requires: " + _format_keys(self.required_keys)
+
+    def at_least_one_required_keys_message(self):
+        return self.class_name + " requires at least one of: "\
+            + _format_keys(self.at_least_one_required_keys)
+
+    def cannot_coexist_message(self):
+        return self.class_name + " members cannot coexist: "\
+            + _format_keys(self.cannot_coexist_keys)
+
+    def not_allowed_message(self, attr):
+        return self.class_name + " does not allow member " + str(attr) + "."\
+            + " Allowed members: " + _format_keys(self.allowed_keys)
+
+    def type_message(self, attr):
+        if attr in self.type_hints:
+            return self.class_name + " member '" + str(attr) + "'" + " be of type " + str(self.type_hints[attr])
+        AttrClass, nullable = self.default_type_spec or self.type_specs[attr]
+        msg = self.class_name + " member '" + str(attr) + "'" + " be of type " + str(AttrClass)
+        if nullable:
+            msg += " or None"
+        return msg
+
+
+class ValidationError:
+    # One problem found by StrictDict.validate(). `path` is the tuple of keys
+    # and list indexes leading to the offending member, `code` the rule that
+    # failed, and `value` the offending value (None for missing members).
+    __slots__ = ("path", "code", "value", "_describe")
+
+    REQUIRED = "required"
+    AT_LEAST_ONE_REQUIRED = "at_least_one_required"
+    CANNOT_COEXIST = "cannot_coexist"
+    NOT_ALLOWED = "not_allowed"
+    TYPE = "type"
+
+    def __init__(self, path, code, value, describe):
+        self.path = path
+        self.code = code
+        self.value = value
+        self._describe = describe
+
+    @property
+    def message(self):
+        return self._describe()
+
+    def __repr__(self):
+        return "ValidationError(path=%r, code=%r, value=%r)" % (self.path, self.code, self.value)
+
+    def __reduce__(self):
+        # Pickled with the message resolved, not the plan that describes it
+        return ValidationError, (self.path, self.code, self.value, partial(str, self.message))
+
+
+def _checked_as(AttrClass, value, raw):
+    # The class a plain dict/list is checked as, being the object it will be
+    # converted to: any such class for raw data and lazy keys, and always a
+    # StrictArray for a list, as JSON carries arrays no other way
+    RawClass = _raw_class(AttrClass, value)
+    if raw or (RawClass is not None and issubclass(RawClass, StrictArray)):
+        return RawClass
+    return None
+
+
+def _collect_dict_errors(plan, mapping, path, errors, raw=False):
+    for key in plan.required_keys:
+        if key not in mapping:
+            errors.append(ValidationError(
+                path + (key,), ValidationError.REQUIRED, None, plan.required_keys_message))
+    if plan.at_least_one_required_keys and plan.at_least_one_required_keys.isdisjoint(mapping):
+        errors.append(ValidationError(
+            path, ValidationError.AT_LEAST_ONE_REQUIRED, None, plan.at_least_one_required_keys_message))
+    coexisting = [key for key in plan.cannot_coexist_keys if key in mapping]
+    if len(coexisting) > 1:
+        errors.append(ValidationError(
+            path, ValidationError.CANNOT_COEXIST, sorted(coexisting, key=str), plan.cannot_coexist_message))
+
+    for key, value in (_dict_items(mapping) if isinstance(mapping, dict) else mapping.items()):
+        if plan.allowed_keys is not None and key not in plan.allowed_keys:
+            errors.append(ValidationError(
+                path + (key,), ValidationError.NOT_ALLOWED, value, partial(plan.not_allowed_message, key)))
+        RawClass = _checked_as(plan.get_type(key), value, raw or key in plan.lazy_types)
+        if RawClass is not None:
+            _collect_raw_errors(RawClass, value, path + (key,), errors)
+            continue
+        check = plan.get_validator(key)
+        if check is not None and not check(value):
+            errors.append(ValidationError(
+                path + (key,), ValidationError.TYPE, value, partial(plan.type_message, key)))
+        _collect_nested_errors(value, path + (key,), errors)
+
+
+def _collect_list_errors(list_class, items, path, errors, raw=False):
+    item_type = list_class._item_type
+    for index, item in enumerate(items):
+        RawClass = _checked_as(item_type, item, raw)
+        if RawClass is not None:
+            _collect_raw_errors(RawClass, item, path + (index,), errors)
+            continue
+        if not isinstance(item, item_type):
+            errors.append(ValidationError(
+                path + (index,), ValidationError.TYPE, item, list_class._type_message))
+        _collect_nested_errors(item, path + (index,), errors)
+
+
+def _collect_raw_errors(Class, value, path, errors):
+    if issubclass(Class, StrictDict):
+        _collect_dict_errors(Class._plan, value, path, errors, raw=True)
+    elif issubclass(Class, StrictArray):
+        for index, item in enumerate(value):
+            try:
+                Class(item)
+            except (TypeError, OverflowError):
+                errors.append(ValidationError(
+                    path + (index,), ValidationError.TYPE, item, Class._type_message))
+    else:
+        _collect_list_errors(Class, value, path, errors, raw=True)
+
+
+def _collect_nested_errors(value, path, errors):
+    if isinstance(value, StrictDict):
+        _collect_dict_errors(value._plan, value, path, errors)
+    elif isinstance(value, StrictList):
+        _collect_list_errors(type(value), value, path, errors)
+
+
+def _member_property(key):
+    # Dot access for a declared key without going through a failed attribute
+    # lookup and __getattr__ first
+    def get_member(self):
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(self.get_class_name() + " has no member '" + key + "'")
+
+    def set_member(self, value):
+        self.__setitem__(key, value)
+    return property(get_member, set_member)
+
+
+class _LazyMembers:
+    # Installed on StrictDict subclasses that declare Meta.lazy_keys. A lazy
+    # key's plain dict/list value is converted and validated the first time
+    # it is read, including the reads made by json.dumps, copy and pickle.
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        lazy_types = self._plan.lazy_types
+        if key in lazy_types:
+            RawClass = _raw_class(lazy_types[key], value)
+            if RawClass is not None:
+                value = _from_raw(RawClass, value)
+                dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def items(self):
+        self.materialize()
+        return dict.items(self)
+
+    def values(self):
+        self.materialize()
+        return dict.values(self)
+
+
+_LAZY_MEMBERS = [(name, member) for name, member in vars(_LazyMembers).items()
+                 if callable(member)]
+
+
+# Builds the ValidationPlan for a class. registry.enable_plan_cache() swaps
+# in a loader that reads plans from its on-disk cache.
+_plan_loader = None
+
+
+def _compile_class(cls):
+    plan = ValidationPlan(cls) if _plan_loader is None else _plan_loader(cls)
+    cls._plan = plan
+    for key in plan.declared_keys:
+        if isinstance(key, str) and _IDENTIFIER.match(key) and not hasattr(cls, key):
+            setattr(cls, key, _member_property(key))
+    if plan.lazy_types and not cls._lazy_members:
+        for member_name, member in _LAZY_MEMBERS:
+            setattr(cls, member_name, member)
+        cls._lazy_members = True
+    return plan
+
+
+class _DeferredPlan:
+    # Stands in for a class's _plan under LAZY_PLANS. The first lookup
+    # compiles the plan and replaces this with it, so later lookups are
+    # plain class attribute reads.
+    def __get__(self, obj, cls):
+        return _compile_class(cls)
+
+
+class _FrozenTypeAttribute:
+    # SomeStrictDict._Frozen is SomeStrictDict.frozen_type(). Generated
+    # frozen classes are named after it, so pickle finds them by reference,
+    # creating them on first use in other processes too.
+    def __get__(self, obj, cls):
+        return cls.frozen_type()
+
+
 class StrictDict(dict):
     class Meta:
         required_keys=set()
@@ -6,132 +694,885 @@ class StrictDict(dict):
         allowed_keys=set()
         item_type={}
 
-    def __init__(self, iterable={}, **kwargs):
-        super(StrictDict, self).__init__({})
-        keys = set(iterable.keys()).union(kwargs.keys())
-        self.validate_required_keys(keys)
-        self.validate_at_least_one_required_keys(keys)
-        for key, val in iterable.iteritems():
-            self.__setitem__(key, val)
-        for key, val in kwargs.iteritems():
-            self.__setitem__(key, val)
+    # Number of Meta.cannot_coexist_keys currently present, kept in sync by
+    # every mutating method so coexistence checks never scan the keys
+    _coexist_count = 0
+
+    # Whether the _LazyMembers methods are installed on this class or a base
+    _lazy_members = False
+
+    _Frozen = _FrozenTypeAttribute()
+
+    def __init_subclass__(cls, **kwargs):
+        # Compiles Meta once per class so instances never re-read it
+        super().__init_subclass__(**kwargs)
+        if LAZY_PLANS:
+            cls._plan = _DeferredPlan()
+        else:
+            _compile_class(cls)
+
+    def __init__(self, iterable=(), **kwargs):
+        # Fill at C level, then validate the whole batch at once. kwargs is
+        # merged as a dict rather than unpacked again.
+        super().__init__(iterable)
+        if kwargs:
+            super().update(kwargs)
+        if _validation_state.unchecked and not VERIFY_TRUSTED:
+            self._count_coexist_keys()
+            return
+        cache = self._plan.validation_cache
+        if cache is not None:
+            cache_key = cache.key_for(self)
+            if cache_key is not None:
+                coexisting = cache.get(cache_key)
+                if coexisting is not None:
+                    self.__dict__["_coexist_count"] = coexisting
+                    return
+        self.validate_required_keys(self)
+        self.validate_at_least_one_required_keys(self)
+        self.__dict__["_coexist_count"] = coexisting = self._validate_items(self)
+        if cache is not None and cache_key is not None:
+            cache.put(cache_key, coexisting)
+
+    @classmethod
+    def trusted(cls, iterable=(), **kwargs):
+        # Builds an instance from already-validated data without running Meta checks
+        if VERIFY_TRUSTED:
+            return cls(iterable, **kwargs)
+        self = cls.__new__(cls)
+        dict.update(self, iterable)
+        if kwargs:
+            dict.update(self, kwargs)
+        self._count_coexist_keys()
+        return self
+
+    @classmethod
+    def validation_cache_info(cls):
+        # Hit/miss/eviction statistics when Meta.validation_cache_size is set
+        if cls._plan.validation_cache is not None:
+            return cls._plan.validation_cache.info()
+
+    @classmethod
+    def clear_validation_cache(cls):
+        if cls._plan.validation_cache is not None:
+            cls._plan.validation_cache.clear()
+
+    @classmethod
+    def validate(cls, mapping):
+        # Checks every Meta rule, and nested StrictDict/StrictList values,
+        # without raising; returns a list of ValidationErrors
+        errors = []
+        _collect_dict_errors(cls._plan, mapping, (), errors)
+        return errors
+
+    @classmethod
+    def validate_many(cls, iterable, workers=1, chunksize=1000, max_pending=None):
+        # Validates records in chunks, across `workers` processes when more
+        # than one, and yields instances or batch.RecordErrors in input order
+        from pyjsonable.batch import validate_many
+        return validate_many(cls, iterable, workers, chunksize, max_pending)
+
+    @classmethod
+    def iter_ndjson(cls, lines, trusted=False, errors="raise"):
+        # Yields an instance per line of newline-delimited JSON, or a
+        # batch.RecordError for invalid lines with errors="yield"
+        from pyjsonable.decoder import iter_ndjson
+        return iter_ndjson(lines, cls, trusted, errors)
+
+    @classmethod
+    def aiter_ndjson(cls, stream, trusted=False, errors="raise", batch_size=100, max_pending=4,
+                     executor=None):
+        # Async iterator version of iter_ndjson; see decoder.aiter_ndjson
+        from pyjsonable.decoder import aiter_ndjson
+        return aiter_ndjson(stream, cls, trusted, errors, batch_size, max_pending, executor)
+
+    @classmethod
+    def frozen_type(cls):
+        # The FrozenStrictDict counterpart of this class, sharing its Meta
+        if issubclass(cls, FrozenStrictDict):
+            return cls
+        frozen_class = _frozen_types.get(cls)
+        if frozen_class is None:
+            frozen_class = _frozen_types[cls] = type(
+                "Frozen" + cls.__name__, (FrozenStrictDict, cls), {
+                    "__module__": cls.__module__,
+                    "__qualname__": cls.__qualname__ + "._Frozen",
+                    "_frozen_from": cls,
+                })
+        return frozen_class
+
+    @classmethod
+    def record_type(cls):
+        # The __slots__-based StrictRecord class generated from this class's Meta
+        record_class = _record_types.get(cls)
+        if record_class is None:
+            record_class = _record_types[cls] = _make_record_type(cls)
+        return record_class
+
+    def patch(self, patch, log=False):
+        # Applies a JSON Merge Patch dict or a list of JSON Patch operations
+        # in place, validating only what changes; see patch.apply_patch
+        from pyjsonable.patch import apply_patch
+        return apply_patch(self, patch, log)
+
+    @classmethod
+    def table_type(cls):
+        # The table.StrictTable class that stores many of these as columns
+        from pyjsonable.table import table_type
+        return table_type(cls)
 
     def __setitem__(self, key, value):
+        if _validation_state.unchecked and not VERIFY_TRUSTED:
+            if key in self._plan.cannot_coexist_keys and key not in self:
+                self.__dict__["_coexist_count"] = self._coexist_count + 1
+            return super().__setitem__(key, value)
         self.validate_attr_is_allowed(attr=key, value=value)
         self.validate_attr_cannot_coexist(attr=key, value=value)
         self.validate_attr_class(attr=key, value=value)
+        if key in self._plan.cannot_coexist_keys and key not in self:
+            self.__dict__["_coexist_count"] = self._coexist_count + 1
         # self[key] = value
-        super(StrictDict, self).__setitem__(key, value)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._forget_coexist_key(key)
+
+    def pop(self, key, *default):
+        present = key in self
+        value = super().pop(key, *default)
+        if present:
+            self._forget_coexist_key(key)
+        return value
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._forget_coexist_key(key)
+        return key, value
+
+    def clear(self):
+        super().clear()
+        self.__dict__["_coexist_count"] = 0
+
+    def setdefault(self, key, default=None):
+        # dict.setdefault would bypass validation
+        if key not in self:
+            self.__setitem__(key, default)
+        return self[key]
+
+    def materialize(self):
+        # Converts and validates every Meta.lazy_keys value still held as a
+        # plain dict/list. Returns self.
+        for key in self._plan.lazy_types:
+            if key in self:
+                self[key]
+        return self
+
+    def _count_coexist_keys(self):
+        cannot_coexist_keys = self._plan.cannot_coexist_keys
+        if cannot_coexist_keys:
+            self.__dict__["_coexist_count"] = sum(1 for key in cannot_coexist_keys if key in self)
+
+    def _forget_coexist_key(self, key):
+        if key in self._plan.cannot_coexist_keys:
+            self.__dict__["_coexist_count"] = self._coexist_count - 1
 
     def __getattr__(self, attr):
-        # Allows getting via dot notation
-        return self.__getitem__(attr)
+        # Allows getting via dot notation. Declared keys have their own
+        # properties, so this is only reached for undeclared ones.
+        try:
+            return self[attr]
+        except KeyError:
+            raise AttributeError(self.get_class_name() + " has no member '" + attr + "'")
 
     def __setattr__(self, attr, value):
-        # Allows setting via dot notation
-        self.__setitem__(attr, value)
+        # Allows setting via dot notation; dunder names stay Python attributes
+        if attr[:2] == "__" and attr[-2:] == "__":
+            object.__setattr__(self, attr, value)
+        else:
+            self.__setitem__(attr, value)
+
+    # Pickling and copying skip validation: the members were checked when
+    # they were stored. Instances are filled at C level, which also keeps
+    # Meta.lazy_keys values as they are held. The items are pickled as state,
+    # after the empty instance is memoized, so self-referencing dicts load.
+
+    def __reduce_ex__(self, protocol):
+        return copyreg.__newobj__, (self.__class__,), dict(self)
+
+    def __setstate__(self, items):
+        if VERIFY_TRUSTED:
+            self.__init__(items)
+            return
+        dict.update(self, items)
+        self._count_coexist_keys()
 
-    def update(self, iterable={}, **kwargs):
-        for key, val in iterable.iteritems():
-            self.__setitem__(key, val)
-        for key, val in kwargs.iteritems():
-            self.__setitem__(key, val)
-        super(StrictDict, self).update({})
+    def __copy__(self):
+        copied = self.__class__.__new__(self.__class__)
+        dict.update(copied, self)
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    def __deepcopy__(self, memo):
+        # Keys and immutable values are shared
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        dict.update(copied, zip(dict.keys(self), _deepcopy_items(dict.values(self), memo)))
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    def update(self, iterable=(), **kwargs):
+        # All or nothing: the batch is validated before anything is stored
+        if _validation_state.unchecked and not VERIFY_TRUSTED:
+            super().update(iterable, **kwargs)
+            self._count_coexist_keys()
+            return
+        items = dict(iterable)
+        if kwargs:
+            items.update(kwargs)
+        coexist_count = self._coexist_count + self._validate_items(items)
+        super().update(items)
+        self.__dict__["_coexist_count"] = coexist_count
+
+    def __ior__(self, other):
+        # d |= other, with the same checks as update()
+        self.update(other)
+        return self
 
     def get_class_name(self):
         return self.__class__.__name__
 
+    def _validate_items(self, items):
+        # Validates a batch of new members against the members already present
+        # and returns how many cannot-coexist keys the batch adds
+        self._validate_keys_allowed(items)
+        coexisting = self._validate_keys_cannot_coexist(items)
+        self._validate_items_class(items)
+        return coexisting
+
+    def _validate_keys_allowed(self, items):
+        plan = self._plan
+        if plan.allowed_keys is not None and not plan.allowed_keys.issuperset(items):
+            for key in items:
+                self.validate_attr_is_allowed(attr=key, value=_dict_getitem(items, key))
+
+    def _validate_keys_cannot_coexist(self, items):
+        plan = self._plan
+        coexisting = 0
+        if plan.cannot_coexist_keys:
+            for key in plan.cannot_coexist_keys:
+                if key in items:
+                    coexisting += 1
+            if coexisting and (coexisting > 1 or self._coexist_count):
+                raise AttributeError(plan.cannot_coexist_message())
+        return coexisting
+
+    def _validate_items_class(self, items):
+        plan = self._plan
+        if plan.default_validator is not None:
+            check = plan.default_validator
+            for key, value in _dict_items(items):
+                if not check(value):
+                    raise TypeError(plan.type_message(key))
+        elif len(items) < len(plan.validator_items):
+            # Walk whichever side is smaller, so a small batch against a wide
+            # schema costs as much as the batch
+            validators = plan.validators
+            for key, value in _dict_items(items):
+                check = validators.get(key)
+                if check is not None and not check(value):
+                    raise TypeError(plan.type_message(key))
+        else:
+            for key, check in plan.validator_items:
+                if key in items and not check(_dict_getitem(items, key)):
+                    raise TypeError(plan.type_message(key))
+
     def validate_required_keys(self, keys):
-        required_keys = getattr(self.Meta, "required_keys", set())
-        if len(list(required_keys.difference( keys ))) > 0:
-            raise AttributeError(self.get_class_name() + " requires: "
-                + str([str(key) for key in required_keys]))
+        plan = self._plan
+        for key in plan.required_keys:
+            if key not in keys:
+                raise AttributeError(plan.required_keys_message())
 
     def validate_at_least_one_required_keys(self, keys):
-        at_least_one_required_keys = getattr(self.Meta, "at_least_one_required_keys", set())
-        if at_least_one_required_keys and len(list(at_least_one_required_keys.intersection( keys ))) < 1:
-            raise AttributeError(self.get_class_name() + " requires at least one of: "
-                + str([str(key) for key in at_least_one_required_keys]))
+        plan = self._plan
+        if not plan.at_least_one_required_keys:
+            return
+        for key in plan.at_least_one_required_keys:
+            if key in keys:
+                return
+        raise AttributeError(plan.at_least_one_required_keys_message())
 
     def validate_attr_cannot_coexist(self, attr, value):
-        keys = set(self.keys())
-        # validate cannot coexist
-        cannot_coexist_keys = getattr(self.Meta, "cannot_coexist_keys", set())
-        if attr in cannot_coexist_keys and len(list(keys.intersection(cannot_coexist_keys))) >= 1:
-            raise AttributeError(self.get_class_name() + " members cannot coexist: "
-                + str([str(key) for key in cannot_coexist_keys]))
+        plan = self._plan
+        if attr in plan.cannot_coexist_keys and self._coexist_count:
+            raise AttributeError(plan.cannot_coexist_message())
 
     def validate_attr_is_allowed(self, attr, value):
-        keys = set(self.keys())
-        # validate allowed keys (union with other sets if present)
-        allowed_keys = getattr(self.Meta, "allowed_keys", set())
-        required_keys = getattr(self.Meta, "required_keys", set())
-        at_least_one_required_keys = getattr(self.Meta, "at_least_one_required_keys", set())
-        cannot_coexist_keys = getattr(self.Meta, "cannot_coexist_keys", set())
-        if allowed_keys:
-            all_allowed_keys = allowed_keys\
-                .union( required_keys )\
-                .union( at_least_one_required_keys )\
-                .union( cannot_coexist_keys )
-            if attr not in all_allowed_keys:
-                raise AttributeError(self.get_class_name() + " does not allow member " + attr + "."\
-                + " Allowed members: " + str([str(key) for key in all_allowed_keys]))
+        plan = self._plan
+        if plan.allowed_keys is not None and attr not in plan.allowed_keys:
+            raise AttributeError(plan.not_allowed_message(attr))
 
     def validate_attr_class(self, attr, value):
-        item_type = getattr(self.Meta, "item_type", None)
-        if not item_type:
-            return
+        plan = self._plan
+        check = plan.get_validator(attr)
+        if check is not None and not check(value):
+            raise TypeError(plan.type_message(attr))
 
-        msg_part = self.get_class_name() + " member '" + attr + "'"\
-            + " be of type "
 
-        # Case where a single type is declared for all dict values
-        if not isinstance(item_type, dict):
-            AttrClass = item_type
-            if not isinstance(value, item_type):
-                raise TypeError(msg_part + str(AttrClass))
-            return
+StrictDict._plan = ValidationPlan(StrictDict)
 
-        # Case where an type map was declared but this attr not present in map
-        if not attr in item_type.keys():
-            return
+_frozen_types = {}
 
-        # The item from the type map
-        mapped_item_type = item_type.get(attr)
 
-        # Case where a single type is declared for this attribute
-        if not isinstance(mapped_item_type, dict):
-            AttrClass = mapped_item_type
-            if not isinstance(value, AttrClass):
-                raise TypeError(msg_part + str(AttrClass))
-            return
+def _new_frozen(cls):
+    frozen_class = cls.frozen_type()
+    return frozen_class.__new__(frozen_class)
 
-        # Case where a complex dict with members "type" and "nullable" declared for this attribute
-        AttrClass = mapped_item_type.get("type")
-        nullable = mapped_item_type.get("nullable", False)
 
-        if (nullable and value == None) or isinstance(value, AttrClass):
-            return
+def _freeze_members(frozen):
+    # Nested StrictDicts are replaced by frozen copies, so a frozen dict never
+    # shares a mutable StrictDict and stays hashable
+    mutable = [(key, value) for key, value in dict.items(frozen)
+               if isinstance(value, StrictDict) and not isinstance(value, FrozenStrictDict)]
+    for key, value in mutable:
+        dict.__setitem__(frozen, key, value.frozen_type().trusted(value))
+
+
+class FrozenStrictDict(StrictDict):
+    # An immutable, hashable StrictDict. Subclass it with a Meta like any
+    # StrictDict, or use SomeStrictDict.frozen_type(). Nested StrictDicts are
+    # frozen too; other mutable values such as lists are kept as given and
+    # make the instance unhashable. Instances are safe to share between
+    # threads, and evolve() derives changed copies that share every
+    # unchanged value.
+    _frozen_from = None
+
+    def __init__(self, iterable=(), **kwargs):
+        super().__init__(iterable, **kwargs)
+        _freeze_members(self)
+
+    @classmethod
+    def trusted(cls, iterable=(), **kwargs):
+        frozen = super().trusted(iterable, **kwargs)
+        _freeze_members(frozen)
+        return frozen
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(self.get_class_name() + " is immutable")
+
+    __setitem__ = __delitem__ = _immutable
+    pop = popitem = clear = setdefault = update = __ior__ = _immutable
+
+    def __setattr__(self, attr, value):
+        raise AttributeError(self.get_class_name() + " is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __hash__(self):
+        try:
+            return self.__dict__["_hash"]
+        except KeyError:
+            self.__dict__["_hash"] = value = hash(frozenset(self.items()))
+            return value
+
+    def __reduce_ex__(self, protocol):
+        # Generated frozen types are rebuilt from the class they freeze
+        if self._frozen_from is not None:
+            return _new_frozen, (self._frozen_from,), dict(self)
+        return copyreg.__newobj__, (self.__class__,), dict(self)
+
+    def evolve(self, iterable=(), **changes):
+        # A copy with `changes` applied; only the changed keys are validated
+        changes = dict(iterable, **changes)
+        self._validate_keys_allowed(changes)
+        self._validate_items_class(changes)
+        evolved = self.__class__.__new__(self.__class__)
+        dict.update(evolved, self)
+        dict.update(evolved, changes)
+        _freeze_members(evolved)
+        evolved._count_coexist_keys()
+        if evolved._coexist_count > 1:
+            raise AttributeError(self._plan.cannot_coexist_message())
+        return evolved
+
+
+class StrictRecord:
+    # A read-only Mapping that stores one StrictDict subclass's members in
+    # __slots__ instead of a hash table. Built by StrictDict.record_type();
+    # each declared key that is a valid identifier also gets a property whose
+    # setter runs that key's Meta checks.
+    __slots__ = ()
+
+    # Set on each generated class
+    _strict_dict_class = None
+    _prototype = None
+    _getters = ()
+    _slots = {}
+
+    def __init__(self, iterable=(), **kwargs):
+        items = dict(iterable, **kwargs)
+        prototype = self._prototype
+        prototype.validate_required_keys(items)
+        prototype.validate_at_least_one_required_keys(items)
+        prototype._validate_items(items)
+        slots = self._slots
+        for key in items:
+            slots[key].__set__(self, items[key])
+
+    def get_class_name(self):
+        return self.__class__.__name__
+
+    def __getattr__(self, attr):
+        # Reached when a field's property finds its slot empty
+        if attr in self._slots:
+            raise AttributeError(self.get_class_name() + " has no member '" + attr + "'")
+        raise AttributeError("'" + self.get_class_name() + "' object has no attribute '" + attr + "'")
+
+    def _set_field(self, key, value):
+        plan = self._prototype._plan
+        check = plan.get_validator(key)
+        if check is not None and not check(value):
+            raise TypeError(plan.type_message(key))
+        if key in plan.cannot_coexist_keys:
+            for other in plan.cannot_coexist_keys:
+                if other in self:
+                    raise AttributeError(plan.cannot_coexist_message())
+        self._slots[key].__set__(self, value)
+
+    def _delete_field(self, key):
+        plan = self._prototype._plan
+        if key in plan.required_keys:
+            raise AttributeError(plan.required_keys_message())
+        self._slots[key].__delete__(self)
+
+    def __getitem__(self, key):
+        try:
+            return self._slots[key].__get__(self)
+        except (AttributeError, KeyError):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self._slots[key].__get__(self)
+        except (AttributeError, KeyError):
+            return False
+        return True
+
+    def __iter__(self):
+        for key, getter in self._getters:
+            try:
+                getter(self)
+            except AttributeError:
+                continue
+            yield key
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def __eq__(self, other):
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    __hash__ = None
+
+    def __repr__(self):
+        return self.get_class_name() + "(" + repr(dict(self.items())) + ")"
+
+    def __reduce__(self):
+        return _rebuild_record, (self._strict_dict_class, dict(self.items()))
+
+    def to_strict_dict(self):
+        return self._strict_dict_class.trusted(self.items())
+
+Mapping.register(StrictRecord)
+
+_record_types = {}
+
+
+def _rebuild_record(cls, items):
+    return cls.record_type()(items)
+
+
+def _record_property(key, getter):
+    def set_field(record, value):
+        record._set_field(key, value)
+
+    def delete_field(record):
+        record._delete_field(key)
+    return property(getter, set_field, delete_field)
+
+
+def _make_record_type(cls):
+    plan = cls._plan
+    if plan.allowed_keys is None:
+        raise TypeError(cls.__name__ + " needs Meta.allowed_keys to generate a record type")
+    keys = sorted(plan.allowed_keys, key=str)
+    slot_names = ["_r%d" % index for index in range(len(keys))]
+    record_class = type(cls.__name__ + "Record", (StrictRecord,), {
+        "__slots__": tuple(slot_names),
+        "__module__": cls.__module__,
+    })
+    record_class._strict_dict_class = cls
+    record_class._prototype = cls.trusted()
+    record_class._slots = dict(
+        (key, getattr(record_class, slot_name)) for key, slot_name in zip(keys, slot_names))
+    getters = [(key, attrgetter(slot_name)) for key, slot_name in zip(keys, slot_names)]
+    record_class._getters = tuple(getters)
+    for key, getter in getters:
+        if isinstance(key, str) and _IDENTIFIER.match(key) and not hasattr(record_class, key):
+            setattr(record_class, key, _record_property(key, getter))
+    return record_class
+
+
+def _first_invalid_item(items, item_type):
+    # Checks each distinct type once instead of every item, and only falls
+    # back to per-item isinstance to find the offender (or for classes whose
+    # instance checks don't follow their type).
+    for Class in set(map(type, items)):
+        if not issubclass(Class, item_type):
+            break
+    else:
+        return None
+    for index, item in enumerate(items):
+        if not isinstance(item, item_type):
+            return index
+    return None
 
-        msg = msg_part + str(AttrClass)
-        if nullable:
-            msg += " or None"
-        raise TypeError(msg)
 
 class StrictList(list):
     class Meta:
-        item_type = basestring
+        item_type = str
+
+    # Meta.item_type, resolved once per class
+    _item_type = str
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._item_type = cls.Meta.item_type
 
     def __init__(self, *args):
-        # super(StrictList, self).__init__()
-        for item in (list(args)):
-            self.append(item)
+        self._validate_items(args)
+        super().__init__(args)
+
+    @classmethod
+    def trusted(cls, iterable=()):
+        # Builds an instance from already-validated items without checking them
+        if VERIFY_TRUSTED:
+            return cls(*iterable)
+        strict_list = cls.__new__(cls)
+        list.extend(strict_list, iterable)
+        return strict_list
 
     def get_class_name(self):
         return self.__class__.__name__
 
+    def patch(self, patch, log=False):
+        # Applies a list of JSON Patch operations; see StrictDict.patch
+        from pyjsonable.patch import apply_patch
+        return apply_patch(self, patch, log)
+
+    # As for StrictDict, pickling and copying skip validation
+
+    def __reduce_ex__(self, protocol):
+        return copyreg.__newobj__, (self.__class__,), list(self)
+
+    def __setstate__(self, items):
+        if VERIFY_TRUSTED:
+            self._validate_items(items)
+        list.extend(self, items)
+
+    def __copy__(self):
+        copied = self.__class__.__new__(self.__class__)
+        list.extend(copied, self)
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    def __deepcopy__(self, memo):
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        list.extend(copied, _deepcopy_items(self, memo))
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    @classmethod
+    def validate(cls, items):
+        # Like StrictDict.validate(), for a sequence of would-be items
+        errors = []
+        _collect_list_errors(cls, items, (), errors)
+        return errors
+
+    @classmethod
+    def _type_message(cls):
+        return cls.__name__ + " items must be of type " + str(cls.Meta.item_type)
+
+    def _type_error(self):
+        return TypeError(self._type_message())
+
+    def _validate_item(self, item):
+        if not isinstance(item, self._item_type):
+            raise self._type_error()
+
+    def _validate_items(self, items):
+        # Bulk operations are validated in full before the list is touched
+        if not isinstance(items, (list, tuple)):
+            items = list(items)
+        if _first_invalid_item(items, self._item_type) is not None:
+            raise self._type_error()
+        return items
+
+    def append(self, item):
+        self._validate_item(item)
+        super().append(item)
+
+    def insert(self, index, item):
+        self._validate_item(item)
+        super().insert(index, item)
+
+    def extend(self, iterable):
+        super().extend(self._validate_items(iterable))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = self._validate_items(value)
+        else:
+            self._validate_item(value)
+        super().__setitem__(index, value)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __add__(self, other):
+        if not isinstance(other, list):
+            return NotImplemented
+        result = self.__class__()
+        list.extend(result, self)
+        result.extend(other)
+        return result
+
+
+# Unboxed typecodes for the primitive item types StrictArray can store
+_TYPECODES = {
+    int: "q",
+    float: "d",
+    bool: "B",
+}
+
+
+def _rebuild_strict_array(cls, data):
+    strict_array = cls()
+    strict_array.frombytes(data)
+    return strict_array
+
+
+class _CheckedItems:
+    # Item checks for arrays whose typecode alone would let wrong items in.
+    # Subclasses define _has_invalid_item(items). Arrays of _trusted_arrays
+    # are taken as they are.
+    __slots__ = ()
+
+    _item_class = None
+    _trusted_arrays = ()
+
+    def _validate_items(self, items):
+        if self._has_invalid_item(items):
+            raise TypeError(self.get_class_name() + " items must be of type " + str(self._item_class))
+
     def append(self, item):
-        if not isinstance(item, self.Meta.item_type):
-            raise TypeError(self.get_class_name() + " items must be of type " +\
-                  str(self.Meta.item_type))
-        super(StrictList, self).append(item)
\ No newline at end of file
+        self._validate_items((item,))
+        super().append(item)
+
+    def insert(self, index, item):
+        self._validate_items((item,))
+        super().insert(index, item)
+
+    def extend(self, iterable):
+        if not isinstance(iterable, self._trusted_arrays):
+            iterable = list(iterable)
+            self._validate_items(iterable)
+        super().extend(iterable)
+
+    def fromlist(self, items):
+        self.extend(items)
+
+    def __iadd__(self, other):
+        if not isinstance(other, array.array):
+            return NotImplemented
+        self.extend(other)
+        return self
+
+    def __setitem__(self, index, value):
+        if not isinstance(index, slice):
+            self._validate_items((value,))
+        elif not isinstance(value, self._trusted_arrays):
+            raise TypeError(self.get_class_name() + " slices can only be assigned from "
+                + self.get_class_name())
+        super().__setitem__(index, value)
+
+
+class _FloatItems(_CheckedItems):
+    # The typecode coerces ints, which JSON numbers decode to, but also bools
+    __slots__ = ()
+
+    _item_class = float
+    _trusted_arrays = array.array
+
+    def _has_invalid_item(self, items):
+        return bool in set(map(type, items))
+
+
+class _BoolItems(_CheckedItems):
+    # Stores bools as 0/1 bytes, but only accepts and returns bools
+    __slots__ = ()
+
+    _item_class = bool
+
+    def _has_invalid_item(self, items):
+        return _first_invalid_item(items, bool) is not None
+
+    def __getitem__(self, index):
+        value = super().__getitem__(index)
+        if isinstance(index, slice):
+            return value
+        return bool(value)
+
+    def __iter__(self):
+        for value in super().__iter__():
+            yield bool(value)
+
+    def tolist(self):
+        return [bool(value) for value in super().tolist()]
+
+    def pop(self, *args):
+        return bool(super().pop(*args))
+
+    def frombytes(self, data):
+        if bytes(data).translate(None, b"\x00\x01"):
+            raise TypeError(self.get_class_name() + " bytes must be 0 or 1")
+        super().frombytes(data)
+
+    def fromfile(self, fp, n):
+        data = fp.read(n * self.itemsize)
+        self.frombytes(data)
+        if len(data) < n * self.itemsize:
+            raise EOFError("read() didn't return enough bytes")
+
+_BoolItems._trusted_arrays = _BoolItems
+
+_ITEM_CHECKS = {float: _FloatItems, bool: _BoolItems}
+
+
+class StrictArrayType(type):
+    # Picks the array typecode from Meta.item_type; float and bool arrays get
+    # the item checks the typecode doesn't do
+    def __new__(mcs, name, bases, attrs):
+        Meta = attrs.get("Meta") or getattr(bases[0], "Meta")
+        item_type = getattr(Meta, "item_type", None)
+        if item_type not in _TYPECODES:
+            raise TypeError(name + " item_type must be one of int, float or bool")
+        ItemChecks = _ITEM_CHECKS.get(item_type)
+        if ItemChecks is not None and not any(issubclass(base, ItemChecks) for base in bases):
+            bases = (ItemChecks,) + bases
+        attrs["_item_typecode"] = _TYPECODES[item_type]
+        return super().__new__(mcs, name, bases, attrs)
+
+
+class StrictArray(array.array, metaclass=StrictArrayType):
+    # A StrictList variant for int, float or bool items that stores them
+    # unboxed in an array.array. The array's typecode does the type checking
+    # and the buffer protocol is available for zero-copy handoff.
+    __slots__ = ()
+
+    class Meta:
+        item_type = int
+
+    def __new__(cls, *args):
+        strict_array = super().__new__(cls, cls._item_typecode)
+        strict_array.extend(args)
+        return strict_array
+
+    def __reduce_ex__(self, protocol):
+        return _rebuild_strict_array, (self.__class__, self.tobytes())
+
+    def _from_array(self, items):
+        # A new instance of this class holding the items of a plain array
+        # with the same typecode, which need no checks
+        strict_array = array.array.__new__(self.__class__, self._item_typecode)
+        array.array.extend(strict_array, items)
+        return strict_array
+
+    # array.array builds plain arrays for these
+
+    def __getitem__(self, index):
+        value = super().__getitem__(index)
+        if isinstance(index, slice):
+            return self._from_array(value)
+        return value
+
+    def __copy__(self):
+        return self._from_array(self)
+
+    def __deepcopy__(self, memo):
+        return self._from_array(self)
+
+    def __add__(self, other):
+        if not isinstance(other, array.array):
+            return NotImplemented
+        added = self._from_array(self)
+        added.extend(other)
+        return added
+
+    def __mul__(self, count):
+        return self._from_array(super().__mul__(count))
+
+    __rmul__ = __mul__
+
+    def get_class_name(self):
+        return self.__class__.__name__
+
+    @classmethod
+    def _type_message(cls):
+        return cls.__name__ + " items must be of type " + str(cls.Meta.item_type)
+
+    @classmethod
+    def _numpy_dtype(cls):
+        import numpy
+        if cls.Meta.item_type is bool:
+            return numpy.dtype(numpy.bool_)
+        return numpy.dtype(cls._item_typecode)
+
+    @classmethod
+    def from_numpy(cls, ndarray):
+        # Requires numpy
+        strict_array = cls()
+        strict_array.frombytes(ndarray.astype(cls._numpy_dtype()).tobytes())
+        return strict_array
+
+    def to_numpy(self):
+        # Zero-copy view of the array's buffer; requires numpy
+        import numpy
+        return numpy.frombuffer(self, dtype=self._numpy_dtype())
+
+
+# A plan cache named in the environment is enabled before any schema module
+# defines its classes
+if os.environ.get("PYJSONABLE_PLAN_CACHE"):
+    from pyjsonable import registry
+    registry.enable_plan_cache(os.environ["PYJSONABLE_PLAN_CACHE"])
@@ -0,0 +1,417 @@
+import array
+from collections.abc import MutableMapping
+
+from pyjsonable.strict_objects import _TYPECODES, _from_raw, _raw_class
+
+# Columnar storage for many rows sharing one StrictDict subclass's Meta.
+# Every declared key is a column: int, float and bool members go in a typed
+# array with a mask byte per row telling whether it holds a value, None or
+# nothing, and other members go in a list. Rows are validated a column at a
+# time, checking each distinct value type once rather than every cell.
+
+
+class _Absent:
+    # Marks a row without the column's key
+    __slots__ = ()
+
+    def __repr__(self):
+        return "<absent>"
+
+_ABSENT = _Absent()
+
+# Mask values for array columns
+_MISSING = 0
+_PRESENT = 1
+_NULL = 2
+
+
+class _ListColumn:
+    __slots__ = ("values",)
+
+    def __init__(self, values=None):
+        self.values = values if values is not None else []
+
+    def get(self, index):
+        return self.values[index]
+
+    def set(self, index, value):
+        self.values[index] = value
+        return True
+
+    def extend(self, values):
+        self.values.extend(values)
+        return True
+
+    def tolist(self, absent=_ABSENT):
+        if absent is _ABSENT:
+            return list(self.values)
+        return [absent if value is _ABSENT else value for value in self.values]
+
+
+class _ArrayColumn:
+    # set() and extend() return False, leaving the column as it was, for
+    # values the array can't hold, such as a bool in an int column or an int
+    # too large for 64 bits. The table then switches to a _ListColumn.
+    __slots__ = ("item_type", "values", "mask")
+
+    def __init__(self, item_type):
+        self.item_type = item_type
+        self.values = array.array(_TYPECODES[item_type])
+        self.mask = bytearray()
+
+    def get(self, index):
+        state = self.mask[index]
+        if state == _PRESENT:
+            value = self.values[index]
+            return bool(value) if self.item_type is bool else value
+        return None if state == _NULL else _ABSENT
+
+    def set(self, index, value):
+        if type(value) is self.item_type:
+            try:
+                self.values[index] = value
+            except OverflowError:
+                return False
+            self.mask[index] = _PRESENT
+        elif value is None or value is _ABSENT:
+            self.values[index] = 0
+            self.mask[index] = _NULL if value is None else _MISSING
+        else:
+            return False
+        return True
+
+    def extend(self, values):
+        item_type = self.item_type
+        if set(map(type, values)) == {item_type}:
+            # Every row has a value, so both parts are built in C
+            data = values
+            mask = bytearray((_PRESENT,)) * len(values)
+        else:
+            data = []
+            mask = bytearray(len(values))
+            for index, value in enumerate(values):
+                if type(value) is item_type:
+                    data.append(value)
+                    mask[index] = _PRESENT
+                elif value is None or value is _ABSENT:
+                    data.append(0)
+                    mask[index] = _NULL if value is None else _MISSING
+                else:
+                    return False
+        try:
+            self.values.extend(array.array(self.values.typecode, data))
+        except OverflowError:
+            return False
+        self.mask.extend(mask)
+        return True
+
+    def tolist(self, absent=_ABSENT):
+        if self.mask.count(_PRESENT) == len(self.mask):
+            values = self.values.tolist()
+            return list(map(bool, values)) if self.item_type is bool else values
+        values = [self.get(index) for index in range(len(self.mask))]
+        return values if absent is _ABSENT else [absent if value is _ABSENT else value for value in values]
+
+
+def _new_column(plan, key):
+    spec = plan.default_type_spec or plan.type_specs.get(key)
+    if spec is not None and spec[0] in _TYPECODES and key not in plan.type_hints:
+        return _ArrayColumn(spec[0])
+    return _ListColumn()
+
+
+def _validate_keys(plan, keys):
+    # The Meta rules about which keys one row may have, in the order
+    # StrictDict checks them
+    for key in plan.required_keys:
+        if key not in keys:
+            raise AttributeError(plan.required_keys_message())
+    if plan.at_least_one_required_keys and plan.at_least_one_required_keys.isdisjoint(keys):
+        raise AttributeError(plan.at_least_one_required_keys_message())
+    if plan.allowed_keys is not None and not plan.allowed_keys.issuperset(keys):
+        for key in keys:
+            if key not in plan.allowed_keys:
+                raise AttributeError(plan.not_allowed_message(key))
+    if len(plan.cannot_coexist_keys.intersection(keys)) > 1:
+        raise AttributeError(plan.cannot_coexist_message())
+
+
+def _validate_cells(check, plan, key, values):
+    for value in values:
+        if value is not _ABSENT and not check(value):
+            raise TypeError(plan.type_message(key))
+
+
+def _validate_column(plan, key, values):
+    check = plan.get_validator(key)
+    if check is None:
+        return
+    if key in plan.type_hints or key in plan.lazy_types:
+        # Checks that look inside values
+        _validate_cells(check, plan, key, values)
+        return
+    AttrClass, nullable = plan.default_type_spec or plan.type_specs[key]
+    value_types = set(map(type, values))
+    value_types.discard(_Absent)
+    if nullable:
+        value_types.discard(type(None))
+    for Class in value_types:
+        if not issubclass(Class, AttrClass):
+            # Finds the offender, or lets classes with their own instance
+            # checks through
+            _validate_cells(check, plan, key, values)
+            return
+
+
+def _materialize_column(AttrClass, values):
+    # Lazy members are stored converted; a table has nothing to defer
+    for index, value in enumerate(values):
+        RawClass = _raw_class(AttrClass, value)
+        if RawClass is not None:
+            values[index] = _from_raw(RawClass, value)
+
+
+class StrictTable:
+    # Many rows of one StrictDict subclass stored as columns. Built by
+    # StrictDict.table_type(); indexing and iterating give StrictTableRow
+    # views, which read and write the columns with the row class's checks.
+    __slots__ = ("_columns", "_extras", "_length")
+
+    # Set on each generated class
+    row_class = None
+    _keys = ()
+
+    def __init__(self, rows=()):
+        self._columns = dict((key, _new_column(self.row_class._plan, key)) for key in self._keys)
+        # Per-row dicts of undeclared keys, once any row has one
+        self._extras = None
+        self._length = 0
+        self.extend(rows)
+
+    @classmethod
+    def trusted(cls, rows=()):
+        # Builds a table from already-validated rows without running Meta checks
+        table = cls.__new__(cls)
+        table._columns = dict((key, _new_column(cls.row_class._plan, key)) for key in cls._keys)
+        table._extras = None
+        table._length = 0
+        table._extend(list(rows), trusted=True)
+        return table
+
+    def get_class_name(self):
+        return self.__class__.__name__
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.trusted([self._row_dict(row_index)
+                                 for row_index in range(*index.indices(self._length))])
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("table index out of range")
+        return StrictTableRow(self, index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield StrictTableRow(self, index)
+
+    def __repr__(self):
+        return "<" + self.get_class_name() + ": " + str(self._length) + " rows>"
+
+    def __reduce__(self):
+        return _rebuild_table, (self.row_class, [self._row_dict(index) for index in range(self._length)])
+
+    def append(self, row):
+        self._extend([row])
+
+    def extend(self, rows):
+        # All or nothing: every row is validated before any is stored
+        self._extend(list(rows))
+
+    def column(self, key, default=None):
+        # The column's values as a list, with `default` for rows without key
+        column = self._columns.get(key)
+        if column is None:
+            extras = self._extras or ()
+            return [row.get(key, default) if row else default for row in extras] \
+                or [default] * self._length
+        return column.tolist(default)
+
+    def to_strict_dicts(self):
+        row_class = self.row_class
+        return [row_class.trusted(self._row_dict(index)) for index in range(self._length)]
+
+    def _extend(self, rows, trusted=False):
+        plan = self.row_class._plan
+        columns = self._columns
+        values_by_key = dict((key, [row.get(key, _ABSENT) for row in rows]) for key in columns)
+
+        # Rows with the same keys in the same order share one check
+        extra_keys_by_keys = {}
+        for row in rows:
+            keys = tuple(row)
+            if keys not in extra_keys_by_keys:
+                if not trusted:
+                    _validate_keys(plan, keys)
+                extra_keys_by_keys[keys] = [key for key in keys if key not in columns]
+        row_extras = None
+        if any(extra_keys_by_keys.values()):
+            row_extras = []
+            for row in rows:
+                extra_keys = extra_keys_by_keys[tuple(row)]
+                row_extras.append(dict((key, row[key]) for key in extra_keys) if extra_keys else None)
+
+        for key, values in values_by_key.items():
+            if key in plan.lazy_types:
+                _materialize_column(plan.lazy_types[key], values)
+            if not trusted:
+                _validate_column(plan, key, values)
+        if row_extras is not None and not trusted:
+            for extras in row_extras:
+                for key, value in (extras or {}).items():
+                    check = plan.get_validator(key)
+                    if check is not None and not check(value):
+                        raise TypeError(plan.type_message(key))
+
+        for key, values in values_by_key.items():
+            column = columns[key]
+            if not column.extend(values):
+                column = columns[key] = _ListColumn(column.tolist())
+                column.extend(values)
+        if row_extras is not None:
+            if self._extras is None:
+                self._extras = [None] * self._length
+            self._extras.extend(row_extras)
+        elif self._extras is not None:
+            self._extras.extend([None] * len(rows))
+        self._length += len(rows)
+
+    def _row_dict(self, index):
+        row = {}
+        for key, column in self._columns.items():
+            value = column.get(index)
+            if value is not _ABSENT:
+                row[key] = value
+        if self._extras is not None and self._extras[index]:
+            row.update(self._extras[index])
+        return row
+
+    def _get_value(self, index, key):
+        column = self._columns.get(key)
+        if column is not None:
+            value = column.get(index)
+            if value is not _ABSENT:
+                return value
+        elif self._extras is not None and self._extras[index] and key in self._extras[index]:
+            return self._extras[index][key]
+        raise KeyError(key)
+
+    def _set_value(self, index, key, value):
+        # The checks StrictDict.__setitem__ runs, against the row's other keys
+        plan = self.row_class._plan
+        if plan.allowed_keys is not None and key not in plan.allowed_keys:
+            raise AttributeError(plan.not_allowed_message(key))
+        if key in plan.cannot_coexist_keys:
+            for other in plan.cannot_coexist_keys:
+                if other in self._row_dict(index):
+                    raise AttributeError(plan.cannot_coexist_message())
+        check = plan.get_validator(key)
+        if check is not None and not check(value):
+            raise TypeError(plan.type_message(key))
+        if key in plan.lazy_types:
+            RawClass = _raw_class(plan.lazy_types[key], value)
+            if RawClass is not None:
+                value = _from_raw(RawClass, value)
+
+        column = self._columns.get(key)
+        if column is None:
+            if self._extras is None:
+                self._extras = [None] * self._length
+            if self._extras[index] is None:
+                self._extras[index] = {}
+            self._extras[index][key] = value
+        elif not column.set(index, value):
+            column = self._columns[key] = _ListColumn(column.tolist())
+            column.set(index, value)
+
+    def _delete_value(self, index, key):
+        plan = self.row_class._plan
+        if key in plan.required_keys:
+            raise AttributeError(plan.required_keys_message())
+        self._get_value(index, key)
+        column = self._columns.get(key)
+        if column is None:
+            del self._extras[index][key]
+        else:
+            column.set(index, _ABSENT)
+
+
+class StrictTableRow(MutableMapping):
+    # One row of a StrictTable, read and written like the row class's
+    # StrictDict, including dot notation
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_index", index)
+
+    def get_class_name(self):
+        return self._table.row_class.__name__
+
+    def __getitem__(self, key):
+        return self._table._get_value(self._index, key)
+
+    def __setitem__(self, key, value):
+        self._table._set_value(self._index, key, value)
+
+    def __delitem__(self, key):
+        self._table._delete_value(self._index, key)
+
+    def __iter__(self):
+        return iter(self._table._row_dict(self._index))
+
+    def __len__(self):
+        return len(self._table._row_dict(self._index))
+
+    def __getattr__(self, attr):
+        try:
+            return self[attr]
+        except KeyError:
+            raise AttributeError(self.get_class_name() + " has no member '" + attr + "'")
+
+    def __setattr__(self, attr, value):
+        self[attr] = value
+
+    def __delattr__(self, attr):
+        try:
+            del self[attr]
+        except KeyError:
+            raise AttributeError(self.get_class_name() + " has no member '" + attr + "'")
+
+    def __repr__(self):
+        return self.get_class_name() + "Row(" + repr(self._table._row_dict(self._index)) + ")"
+
+    def to_strict_dict(self):
+        return self._table.row_class.trusted(self._table._row_dict(self._index))
+
+
+_table_types = {}
+
+
+def _rebuild_table(row_class, rows):
+    return table_type(row_class).trusted(rows)
+
+
+def table_type(cls):
+    table_class = _table_types.get(cls)
+    if table_class is None:
+        table_class = _table_types[cls] = type(cls.__name__ + "Table", (StrictTable,), {
+            "__slots__": (),
+            "__module__": cls.__module__,
+            "row_class": cls,
+            "_keys": tuple(sorted(cls._plan.declared_keys, key=str)),
+        })
+    return table_class
@@ -1,16 +1,15 @@
-from setuptools import find_packages
-
-# # -*- coding: utf-8 -*-
-from distutils.core import setup
+# -*- coding: utf-8 -*-
+from setuptools import find_packages, setup
 
 setup(
     name='pyjsonable',
     version='0.6',
     author=u'Grace Carey',
     author_email='gracecareymail@gmail.com',
-    packages=find_packages(),
+    packages=find_packages(exclude=['tests', 'benchmarks']),
     url='https://github.com/gracecarey/pyjsonable',
     license='BSD',
     description='Native, validatable python objects serializable by json.dumps()',
+    python_requires='>=3.7',
     zip_safe=False
-)
\ No newline at end of file
+)
@@ -0,0 +1,62 @@
+import pickle
+
+from pyjsonable.batch import RecordError
+from pyjsonable.strict_objects import ValidationError
+from tests.test_pyjsonable import PyJasonTestBase, CakedDictTyped, FrozenCakedDictTyped
+
+# To run:
+# $ python -m unittest tests.test_batch
+
+
+def _cake_records(count):
+    for index in range(count):
+        if index % 10 == 3:
+            yield {"type": "birthday", "is_vegan": "no"}
+        elif index % 10 == 7:
+            yield {"type": "birthday"}
+        else:
+            yield {"type": "birthday", "is_vegan": False, "cups_sugar": index}
+
+
+class ValidateManyTests(PyJasonTestBase):
+    def _test_results(self, results, count):
+        results = list(results)
+        self.assertEqual(len(results), count)
+        for index, result in enumerate(results):
+            if index % 10 == 3:
+                self.assertIsInstance(result, RecordError)
+                self.assertEqual(result.index, index)
+                self.assertEqual(result.error_type, "TypeError")
+                self.assertEqual([(error.path, error.code, error.value) for error in result.errors],
+                                 [(("is_vegan",), ValidationError.TYPE, "no")])
+            elif index % 10 == 7:
+                self.assertEqual(result.error_type, "AttributeError")
+                self.assertEqual([(error.path, error.code) for error in result.errors],
+                                 [(("is_vegan",), ValidationError.REQUIRED)])
+                self.assertIn("is_vegan", result.errors[0].message)
+            else:
+                self.assertIsInstance(result, CakedDictTyped)
+                self.assertEqual(result.cups_sugar, index)
+
+    def test_in_process(self):
+        self._test_results(CakedDictTyped.validate_many(_cake_records(55), chunksize=7), 55)
+
+    def test_process_pool(self):
+        results = CakedDictTyped.validate_many(_cake_records(250), workers=2, chunksize=9, max_pending=3)
+        self._test_results(results, 250)
+
+    def test_frozen_type_in_process_pool(self):
+        FrozenCake = CakedDictTyped.frozen_type()
+        self.assertIs(pickle.loads(pickle.dumps(FrozenCake)), FrozenCake)
+        self.assertIsNot(pickle.loads(pickle.dumps(FrozenCake)), FrozenCakedDictTyped)
+        results = list(FrozenCake.validate_many(_cake_records(30), workers=2, chunksize=4))
+        self.assertEqual(len(results), 30)
+        self.assertIs(type(results[0]), FrozenCake)
+        self.assertEqual(results[3].error_type, "TypeError")
+
+    def test_record_error_pickles(self):
+        error = next(iter(CakedDictTyped.validate_many([{"type": "birthday", "is_vegan": "no"}])))
+        unpickled = pickle.loads(pickle.dumps(error))
+        self.assertEqual(unpickled, error)
+        self.assertEqual(unpickled.errors[0].path, ("is_vegan",))
+        self.assertEqual(unpickled.errors[0].message, error.errors[0].message)
@@ -0,0 +1,91 @@
+import io
+import json
+import tempfile
+
+from pyjsonable import binary
+from pyjsonable.strict_objects import StrictDict
+from tests.test_pyjsonable import (PyJasonTestBase, CakeList, CakeDict, CakedDictTyped, FrostingDict,
+    FrozenCakeDict, LazyCakeDict, PartyBudget, PartyExpenseItem, UserHistory, UserFlags)
+
+# To run:
+# $ python -m unittest tests.test_binary
+
+
+def _cake():
+    return CakedDictTyped(
+        type="birthday",
+        is_vegan=False,
+        cups_sugar=5,
+        decorations=["sprinkles", {"kind": "candle"}, (1.5, None)],
+        frosting=FrostingDict(cups_milk=4, cups_powdered_sugar=7.25),
+    )
+
+
+class BinaryTests(PyJasonTestBase):
+    def test_round_trip(self):
+        cake = _cake()
+        loaded = binary.loads(binary.dumps(cake))
+        self.assertIsInstance(loaded, CakedDictTyped)
+        self.assertIsInstance(loaded.frosting, FrostingDict)
+        self.assertEqual(loaded.decorations[2], (1.5, None))
+        self.assertEqual(loaded, cake)
+
+        cakes = CakeList(*[CakeDict(type="birthday", is_vegan=False, hue="blue", milk_type="2%")] * 20)
+        self.assertLess(len(binary.dumps(cakes)), len(json.dumps(cakes)))
+        loaded = binary.loads(binary.dumps(cakes))
+        self.assertIsInstance(loaded, CakeList)
+        self.assertIsInstance(loaded[0], CakeDict)
+        self.assertEqual(loaded, cakes)
+        self.assertEqual(loaded[0]._coexist_count, 1)
+
+        budget = PartyBudget(food=PartyExpenseItem(cost_per_guest=5, total_cost=500, vendor="deli"))
+        loaded = binary.loads(binary.dumps([budget, {"plain": budget}]))
+        self.assertIsInstance(loaded[1]["plain"].food, PartyExpenseItem)
+        self.assertEqual(loaded[0].food.vendor, "deli")
+
+    def test_other_strict_types(self):
+        frozen = CakedDictTyped.frozen_type()(type="birthday", is_vegan=False)
+        loaded = binary.loads(binary.dumps([frozen, FrozenCakeDict(type="birthday", is_vegan=False, hue="red")]))
+        self.assertIs(type(loaded[0]), type(frozen))
+        self.assertIs(type(loaded[1]), FrozenCakeDict)
+
+        loaded = binary.loads(binary.dumps([UserHistory(1, -2, 3), UserFlags(True, False)]))
+        self.assertIsInstance(loaded[0], UserHistory)
+        self.assertEqual(loaded[0].tolist(), [1, -2, 3])
+        self.assertEqual(loaded[1].tolist(), [True, False])
+
+        cake = LazyCakeDict(type="birthday", is_vegan=False, frosting={"cups_powdered_sugar": 7})
+        loaded = binary.loads(binary.dumps(cake))
+        self.assertIs(type(dict.__getitem__(loaded, "frosting")), dict)
+        self.assertIsInstance(loaded.frosting, FrostingDict)
+
+        with self.assertRaises(TypeError):
+            binary.dumps({"when": object()})
+
+    def test_classes(self):
+        data = binary.dumps(_cake())
+        self.assertEqual(binary.loads(data, classes=[CakedDictTyped, FrostingDict]), _cake())
+        with self.assertRaises(ValueError):
+            binary.loads(data, classes=[CakedDictTyped])
+        with self.assertRaises(ValueError):
+            binary.loads(b"{}")
+
+        # A changed schema is validated instead of trusted
+        class ChangedCakeDict(StrictDict):
+            class Meta:
+                required_keys = {"type", "is_vegan", "num_layers"}
+        ChangedCakeDict.__module__ = CakedDictTyped.__module__
+        ChangedCakeDict.__qualname__ = CakedDictTyped.__qualname__
+        with self.assertRaises(AttributeError):
+            binary.loads(data, classes=[ChangedCakeDict, FrostingDict])
+
+    def test_files(self):
+        cake = _cake()
+        with tempfile.TemporaryFile() as fp:
+            binary.dump(cake, fp)
+            fp.flush()
+            self.assertEqual(binary.load(fp), cake)
+        buffer = io.BytesIO()
+        binary.dump(cake, buffer)
+        buffer.seek(0)
+        self.assertEqual(binary.load(buffer), cake)
@@ -0,0 +1,176 @@
+import asyncio
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from pyjsonable import decoder, encoder
+from pyjsonable.batch import RecordError
+from pyjsonable.strict_objects import ValidationError
+from tests.test_pyjsonable import (PyJasonTestBase, CakeList, CakeDict, CakedDictTyped, FrostingDict,
+    PartyBudget, PartyExpenseItem, SiteInfoMap, ComplexLink, LazyCakeDict, UserProfile, UserHistory,
+    UserScores, UserFlags)
+
+# To run:
+# $ python -m unittest tests.test_decoder
+
+CAKE_JSON = json.dumps({
+    "type": "birthday",
+    "is_vegan": False,
+    "cups_sugar": 5,
+    "decorations": ["sprinkles", {"kind": "candle"}],
+    "frosting": {
+        "cups_milk": 4,
+        "cups_powdered_sugar": 7
+    }
+})
+
+
+class DecoderTests(PyJasonTestBase):
+    def test_loads_nested_types(self):
+        cake = decoder.loads(CAKE_JSON, CakedDictTyped)
+        self.assertIsInstance(cake, CakedDictTyped)
+        self.assertIsInstance(cake.frosting, FrostingDict)
+        self.assertEqual(cake.frosting.cups_milk, 4)
+        self.assertEqual(type(cake.decorations[1]), dict)
+        self.assertDictEqual(cake, json.loads(CAKE_JSON))
+
+    def test_loads_validates(self):
+        with self.assertRaises(TypeError):
+            decoder.loads('{"type": "birthday", "is_vegan": false, "frosting": {'
+                          '"cups_milk": "four", "cups_powdered_sugar": 7}}', CakedDictTyped)
+        with self.assertRaises(AttributeError):
+            decoder.loads('{"frosting": null}', CakedDictTyped)
+        cake = decoder.loads('{"frosting": null}', CakedDictTyped, trusted=True)
+        self.assertIsNone(cake.frosting)
+
+    def test_loads_item_type_without_map(self):
+        budget = decoder.loads('{"food": {"cost_per_guest": 50, "total_cost": 500}}', PartyBudget)
+        self.assertIsInstance(budget.food, PartyExpenseItem)
+        site_info = decoder.loads('{"more_link": {"href": "www.about.com"}, "total_pages": 1}', SiteInfoMap)
+        self.assertIsInstance(site_info.more_link, ComplexLink)
+
+    def test_loads_strict_list(self):
+        cakes = decoder.loads('[{"type": "birthday", "is_vegan": true, "color": "red"}]', CakeList)
+        self.assertIsInstance(cakes, CakeList)
+        self.assertIsInstance(cakes[0], CakeDict)
+
+        # trusted=True skips item checks for lists as it does for dicts
+        with self.assertRaises(TypeError):
+            decoder.loads('[{"type": "birthday", "is_vegan": true, "color": "red"}, "pie"]', CakeList)
+        cakes = decoder.loads('[{"type": "birthday", "is_vegan": true, "color": "red"}, "pie"]', CakeList,
+                              trusted=True)
+        self.assertIsInstance(cakes, CakeList)
+        self.assertIsInstance(cakes[0], CakeDict)
+        self.assertEqual(cakes[1], "pie")
+
+    def test_strict_array_round_trip(self):
+        profile = UserProfile(history=UserHistory(1, 2, 3), scores=UserScores(0.5), flags=UserFlags(True))
+        loaded = decoder.loads(encoder.dumps(profile), UserProfile)
+        self.assertIsInstance(loaded.history, UserHistory)
+        self.assertIsInstance(loaded.scores, UserScores)
+        self.assertIsInstance(loaded.flags, UserFlags)
+        self.assertEqual(loaded, profile)
+        with self.assertRaises(TypeError):
+            decoder.loads('{"history": [1, 2.5]}', UserProfile)
+        with self.assertRaises(TypeError):
+            decoder.loads('{"flags": [1]}', UserProfile)
+
+    def test_loads_lazy_keys(self):
+        cake = decoder.loads(CAKE_JSON, LazyCakeDict)
+        self.assertIs(type(dict.__getitem__(cake, "frosting")), dict)
+        self.assertIsInstance(cake.frosting, FrostingDict)
+        self.assertDictEqual(cake, json.loads(CAKE_JSON))
+
+    def test_iter_ndjson(self):
+        stream = io.BytesIO((CAKE_JSON + "\n\n" + CAKE_JSON + "\n").encode("utf-8"))
+        cakes = list(decoder.iter_ndjson(stream, CakedDictTyped))
+        self.assertEqual(len(cakes), 2)
+        for cake in cakes:
+            self.assertIsInstance(cake.frosting, FrostingDict)
+            self._test_json_dumps(cake)
+
+    def test_iter_ndjson_errors(self):
+        lines = [CAKE_JSON, "{not json", "", '{"type": "birthday"}', CAKE_JSON]
+        with self.assertRaises(ValueError):
+            list(decoder.iter_ndjson(lines, CakedDictTyped))
+        results = list(CakedDictTyped.iter_ndjson(lines, errors="yield"))
+        self.assertEqual(len(results), 4)
+        self.assertEqual([(error.index, error.error_type) for error in results[1:3]],
+                         [(1, "JSONDecodeError"), (3, "AttributeError")])
+        self.assertIsInstance(results[3], CakedDictTyped)
+        self.assertEqual(results[1].errors, [])
+        self.assertEqual([(error.path, error.code) for error in results[2].errors],
+                         [(("is_vegan",), ValidationError.REQUIRED)])
+
+        # Nested objects are checked as the classes they decode into
+        results = list(CakedDictTyped.iter_ndjson(['{"type": "birthday", "is_vegan": false, "frosting": '
+                                                   '{"cups_milk": "four", "cups_powdered_sugar": 7}}'],
+                                                  errors="yield"))
+        self.assertEqual(results[0].error_type, "TypeError")
+        self.assertEqual([(error.path, error.code, error.value) for error in results[0].errors],
+                         [(("frosting", "cups_milk"), ValidationError.TYPE, "four")])
+
+
+class _Lines:
+    # An async stream of lines that counts how far it has been read
+    def __init__(self, lines):
+        self.lines = lines
+        self.read = 0
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.read == len(self.lines):
+            raise StopAsyncIteration
+        self.read += 1
+        await asyncio.sleep(0)
+        return self.lines[self.read - 1]
+
+
+class AsyncDecoderTests(PyJasonTestBase):
+    def _collect(self, stream, **kwargs):
+        async def collect():
+            return [value async for value in CakedDictTyped.aiter_ndjson(stream, **kwargs)]
+        return asyncio.run(collect())
+
+    def test_stream_reader(self):
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data((CAKE_JSON + "\n\n" + CAKE_JSON + "\n").encode("utf-8"))
+            reader.feed_eof()
+            return [cake async for cake in decoder.aiter_ndjson(reader, CakedDictTyped, batch_size=1)]
+        cakes = asyncio.run(read())
+        self.assertEqual(len(cakes), 2)
+        self.assertIsInstance(cakes[1].frosting, FrostingDict)
+
+    def test_executor_keeps_order(self):
+        lines = [CAKE_JSON if index % 7 else '{"type": "birthday"}' for index in range(50)]
+        with ThreadPoolExecutor(2) as executor:
+            results = self._collect(_Lines(lines), errors="yield", batch_size=4, executor=executor)
+        self.assertEqual(len(results), 50)
+        for index, result in enumerate(results):
+            if index % 7:
+                self.assertIsInstance(result, CakedDictTyped)
+            else:
+                self.assertEqual(result.index, index)
+                self.assertIsInstance(result, RecordError)
+        with self.assertRaises(AttributeError):
+            with ThreadPoolExecutor(2) as executor:
+                self._collect(_Lines(lines), batch_size=4, executor=executor)
+
+    def test_backpressure(self):
+        stream = _Lines([CAKE_JSON] * 100)
+
+        async def read_some():
+            reads = []
+            async for cake in decoder.aiter_ndjson(stream, CakedDictTyped, batch_size=2, max_pending=2):
+                await asyncio.sleep(0.001)
+                reads.append(stream.read)
+                if len(reads) == 10:
+                    break
+            return reads
+        reads = asyncio.run(read_some())
+        # The queue holds batch_size * max_pending lines, plus one batch being decoded
+        for consumed, read in enumerate(reads, 1):
+            self.assertLessEqual(read - consumed, 2 * 2 + 2 + 1)
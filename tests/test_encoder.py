@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import enum
+import io
+import json
+import tempfile
+
+from pyjsonable import encoder
+from tests.test_pyjsonable import (PyJasonTestBase, CakeList, CakeDict, CakedDictTyped, FrostingDict,
+    PartyBudget, PartyExpenseItem, SiteInfoMap, ComplexLink, NoMetaDict, UserHistory, UserScores,
+    UserFlags)
+
+# To run:
+# $ python -m unittest tests.test_encoder
+
+
+class EncoderTests(PyJasonTestBase):
+    def _assert_same_as_json(self, obj):
+        self.assertEqual(encoder.dumps(obj), json.dumps(obj))
+
+    def test_typed_dicts(self):
+        self._assert_same_as_json(CakedDictTyped(
+            type="birthday",
+            is_vegan=False,
+            cups_sugar=5,
+            num_layers=2,
+            decorations=["sprinkles", {"kind": u"bougie à la crème"}, (1.5, None)],
+            frosting=FrostingDict(
+                cups_milk=4,
+                cups_powdered_sugar=7.25
+            )
+        ))
+        self._assert_same_as_json(CakedDictTyped(type="birthday", is_vegan=True, frosting=None))
+        self._assert_same_as_json(PartyBudget(
+            food=PartyExpenseItem(cost_per_guest=50, total_cost=float("inf")),
+        ))
+        self._assert_same_as_json(SiteInfoMap(
+            about=ComplexLink(href="www.about.com"),
+            total_pages=10,
+        ))
+
+    def test_untyped_values_and_keys(self):
+        self._assert_same_as_json(NoMetaDict({
+            1: True,
+            2.5: None,
+            None: [CakeDict(type="birthday", is_vegan=False, hue="blue")],
+            "nested": {"deep": [{"deeper": float("nan")}]},
+        }))
+        self._assert_same_as_json(CakeList(CakeDict(type="birthday", is_vegan=False, hue="blue")))
+        with self.assertRaises(TypeError):
+            encoder.dumps(NoMetaDict(value=object()))
+        with self.assertRaises(TypeError):
+            encoder.dumps(NoMetaDict({(1, 2): "tuple key"}))
+
+        class Size(enum.IntEnum):
+            SMALL = 1
+
+        class Ratio(float):
+            pass
+
+        self._assert_same_as_json(NoMetaDict({Size.SMALL: "small", Ratio(0.5): "half"}))
+
+    def test_circular_reference(self):
+        cake = CakedDictTyped(type="birthday", is_vegan=False, decorations=["sprinkles"])
+        cake.decorations.append(cake)
+        with self.assertRaisesRegex(ValueError, "Circular reference detected"):
+            encoder.dumps(cake)
+        cake = CakedDictTyped(type="birthday", is_vegan=False, decorations=["sprinkles"])
+        cake.decorations.append({"cake": cake})
+        with self.assertRaisesRegex(ValueError, "Circular reference detected"):
+            encoder.dumps(cake)
+        with self.assertRaisesRegex(ValueError, "Circular reference detected"):
+            encoder.get_encoder(CakedDictTyped).encode(cake)
+
+        # Values shared without a cycle are encoded each time
+        frosting = FrostingDict(cups_powdered_sugar=7)
+        self._assert_same_as_json(NoMetaDict(first=frosting, second=[frosting, frosting]))
+
+    def test_strict_arrays(self):
+        histories = NoMetaDict(
+            history=UserHistory(1, 2),
+            scores=UserScores(0.5),
+            flags=UserFlags(True, False),
+        )
+        self.assertEqual(encoder.dumps(histories), json.dumps(histories, default=encoder.default))
+        self.assertEqual(json.loads(encoder.dumps(histories)), {
+            "history": [1, 2], "scores": [0.5], "flags": [True, False]
+        })
+
+    def test_dump_and_dumpb(self):
+        cake = CakeDict(type="birthday", is_vegan=False, hue="blue")
+        self.assertEqual(encoder.dumpb(cake), json.dumps(cake).encode("ascii"))
+        binary = io.BytesIO()
+        encoder.dump(cake, binary)
+        self.assertEqual(binary.getvalue(), encoder.dumpb(cake))
+        with tempfile.TemporaryFile(mode="w+") as text:
+            encoder.dump(cake, text)
+            text.seek(0)
+            self.assertEqual(json.load(text), cake)
@@ -0,0 +1,60 @@
+from pyjsonable import instrumentation
+from pyjsonable.strict_objects import StrictDict
+from tests.test_pyjsonable import PyJasonTestBase, CakeDict, CakedDictTyped
+
+# To run:
+# $ python -m unittest tests.test_instrumentation
+
+
+class InstrumentationTests(PyJasonTestBase):
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrumentation.is_enabled())
+        validate_attr_class = StrictDict.__dict__["validate_attr_class"]
+        CakeDict(type="birthday", is_vegan=False, hue="blue")
+        self.assertEqual(instrumentation.snapshot(), {})
+
+        with instrumentation.instrumented():
+            self.assertIsNot(StrictDict.__dict__["validate_attr_class"], validate_attr_class)
+        self.assertIs(StrictDict.__dict__["validate_attr_class"], validate_attr_class)
+
+    def test_counts_per_class_and_rule(self):
+        with instrumentation.instrumented():
+            cake = CakeDict(type="birthday", is_vegan=False, hue="blue")
+            cake["num_layers"] = 3
+            with self.assertRaises(AttributeError):
+                cake["wack_key"] = 1
+            with self.assertRaises(TypeError):
+                CakedDictTyped(type="birthday", is_vegan="no")
+        CakeDict(type="birthday", is_vegan=False, hue="blue")
+
+        stats = instrumentation.snapshot()
+        self.assertEqual(set(stats), {CakeDict, CakedDictTyped})
+        cake_stats = stats[CakeDict]
+        self.assertEqual(cake_stats["validate_required_keys"].calls, 1)
+        self.assertEqual(cake_stats["validate_attr_is_allowed"].calls, 3)
+        self.assertEqual(cake_stats["validate_attr_is_allowed"].failures, 1)
+        self.assertEqual(cake_stats["validate_attr_class"].calls, 2)
+        self.assertGreaterEqual(cake_stats["validate_attr_class"].seconds, 0)
+        self.assertEqual(stats[CakedDictTyped]["validate_attr_class"].failures, 1)
+
+    def test_callbacks(self):
+        events = []
+        callback = lambda cls, rule, seconds, failed: events.append((cls, rule, failed))
+        instrumentation.add_callback(callback)
+        try:
+            with instrumentation.instrumented():
+                with self.assertRaises(AttributeError):
+                    CakeDict(type="birthday", is_vegan=False)
+        finally:
+            instrumentation.remove_callback(callback)
+        self.assertEqual(events, [
+            (CakeDict, "validate_required_keys", False),
+            (CakeDict, "validate_at_least_one_required_keys", True),
+        ])
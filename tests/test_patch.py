@@ -0,0 +1,141 @@
+import json
+
+from pyjsonable.patch import Change, PatchError
+from tests.test_pyjsonable import (PyJasonTestBase, CakeList, CakeDict, CakedDictTyped, FrostingDict,
+    LazyCakeDict)
+
+# To run:
+# $ python -m unittest tests.test_patch
+
+
+def _cake():
+    return LazyCakeDict(
+        type="birthday",
+        is_vegan=False,
+        cups_sugar=5,
+        decorations=["sprinkles", "candles"],
+        frosting=FrostingDict(cups_milk=4, cups_powdered_sugar=7),
+        tiers=CakeList(CakeDict(type="sponge", is_vegan=True, hue="white", milk_type="oat")),
+    )
+
+
+class MergePatchTests(PyJasonTestBase):
+    def test_merge_patch(self):
+        cake = _cake()
+        changes = cake.patch({
+            "cups_sugar": 6,
+            "num_layers": None,
+            "decorations": None,
+            "frosting": {"cups_milk": None, "cups_powdered_sugar": 8},
+        }, log=True)
+        self.assertEqual(changes, [
+            Change("replace", "/cups_sugar", 5, 6),
+            Change("remove", "/decorations", ["sprinkles", "candles"], None),
+            Change("remove", "/frosting/cups_milk", 4, None),
+            Change("replace", "/frosting/cups_powdered_sugar", 7, 8),
+        ])
+        self.assertEqual(cake.frosting, {"cups_powdered_sugar": 8})
+        self.assertNotIn("decorations", cake)
+
+        cake.patch({"frosting": None})
+        self.assertIsNone(cake.patch({"frosting": {"cups_powdered_sugar": 1, "cups_milk": None}}))
+        self.assertIsInstance(cake.frosting, FrostingDict)
+        self.assertEqual(cake.frosting, {"cups_powdered_sugar": 1})
+
+    def test_rolls_back(self):
+        cake = _cake()
+        before = json.dumps(cake)
+        with self.assertRaises(AttributeError):
+            cake.patch({"cups_sugar": 6, "type": None})
+        with self.assertRaises(TypeError):
+            cake.patch({"cups_sugar": 6, "frosting": {"cups_milk": "four"}})
+        with self.assertRaises(AttributeError):
+            cake.patch({"wack_key": 1})
+        with self.assertRaises(TypeError):
+            cake.patch({"cups_sugar": 6, "tiers": {"not": "a list"}})
+        self.assertEqual(json.dumps(cake), before)
+
+
+class JSONPatchTests(PyJasonTestBase):
+    def test_operations(self):
+        cake = _cake()
+        cake.patch([
+            {"op": "test", "path": "/frosting/cups_milk", "value": 4},
+            {"op": "test", "path": "/frosting", "value": {"cups_milk": 4, "cups_powdered_sugar": 7}},
+            {"op": "test", "path": "/tiers/0/is_vegan", "value": True},
+            {"op": "test", "path": "/decorations", "value": ["sprinkles", "candles"]},
+            {"op": "add", "path": "/decorations/1", "value": "flowers"},
+            {"op": "add", "path": "/decorations/-", "value": "sparklers"},
+            {"op": "remove", "path": "/decorations/0"},
+            {"op": "replace", "path": "/tiers/0/hue", "value": "cream"},
+            {"op": "copy", "from": "/tiers/0", "path": "/tiers/-"},
+            {"op": "move", "from": "/tiers/1/milk_type", "path": "/tiers/1/vegan_milk_type"},
+            {"op": "add", "path": "/tiers/-", "value": {"type": "sheet", "is_vegan": True, "color": "red"}},
+        ])
+        self.assertEqual(cake.decorations, ["flowers", "candles", "sparklers"])
+        self.assertEqual(cake.tiers[0], {"type": "sponge", "is_vegan": True, "hue": "cream", "milk_type": "oat"})
+        self.assertEqual(cake.tiers[1].vegan_milk_type, "oat")
+        self.assertIsInstance(cake.tiers[2], CakeDict)
+        self.assertIsNot(cake.tiers[1], cake.tiers[0])
+
+    def test_rolls_back(self):
+        cake = _cake()
+        before = json.dumps(cake)
+        with self.assertRaises(AttributeError):
+            cake.patch([
+                {"op": "remove", "path": "/decorations/0"},
+                {"op": "add", "path": "/tiers/0/vegan_milk_type", "value": "almond"},
+            ])
+        with self.assertRaises(TypeError):
+            cake.patch([
+                {"op": "replace", "path": "/cups_sugar", "value": 1},
+                {"op": "add", "path": "/tiers/0", "value": "not a cake"},
+            ])
+        with self.assertRaises(PatchError):
+            cake.patch([
+                {"op": "remove", "path": "/type"},
+                {"op": "add", "path": "/type", "value": "wedding"},
+                {"op": "test", "path": "/type", "value": "birthday"},
+            ])
+        self.assertEqual(json.dumps(cake), before)
+
+        # Moves may pass through states the rules don't allow
+        cake.patch([
+            {"op": "remove", "path": "/type"},
+            {"op": "add", "path": "/type", "value": "wedding"},
+        ])
+        self.assertEqual(cake.type, "wedding")
+
+    def test_invalid_patches(self):
+        cake = _cake()
+        for patch in (
+            [{"op": "remove", "path": "/num_layers"}],
+            [{"op": "replace", "path": "/decorations/2", "value": "bows"}],
+            [{"op": "add", "path": "/decorations/01", "value": "bows"}],
+            [{"op": "add", "path": "/cups_sugar/inside", "value": 1}],
+            [{"op": "replace", "path": "", "value": {}}],
+            [{"op": "move", "from": "/tiers", "path": "/tiers/0/more"}],
+            [{"op": "test", "path": "/cups_sugar", "value": 5.0}],
+            [{"op": "test", "path": "/is_vegan", "value": 0}],
+            [{"op": "test", "path": "/tiers/0/is_vegan", "value": 1}],
+            [{"op": "test", "path": "/decorations", "value": ["sprinkles"]}],
+            [{"op": "test", "path": "/frosting", "value": {"cups_milk": 4, "cups_powdered_sugar": 7.0}}],
+            [{"op": "frost", "path": "/type"}],
+            [{"path": "/type"}],
+            "not a patch",
+        ):
+            with self.assertRaises(PatchError):
+                cake.patch(patch)
+
+        frozen = CakedDictTyped.frozen_type()(type="birthday", is_vegan=False)
+        with self.assertRaises(TypeError):
+            frozen.patch({"cups_sugar": 1})
+        with self.assertRaises(TypeError):
+            frozen.patch([{"op": "add", "path": "/cups_sugar", "value": 1}])
+
+    def test_only_changes_are_validated(self):
+        cake = CakedDictTyped.trusted(type="birthday", is_vegan=False, cups_sugar="FIVE")
+        cake.patch([{"op": "add", "path": "/num_layers", "value": 2}])
+        self.assertEqual(cake.num_layers, 2)
+        with self.assertRaises(TypeError):
+            cake.patch([{"op": "copy", "from": "/cups_sugar", "path": "/num_layers"}])
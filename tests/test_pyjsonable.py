@@ -1,7 +1,25 @@
+import array
+import copy
 import json
+import pickle
+import typing
 import unittest
+from typing import ClassVar, Dict, List, Optional, Tuple, Union
 
-from pyjsonable.strict_objects import StrictDict, StrictList
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from pyjsonable import strict_objects
+from pyjsonable import encoder
+from pyjsonable.strict_objects import (StrictDict, StrictList, StrictArray, StrictRecord, FrozenStrictDict,
+    ValidationError, unchecked)
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # To run:
 # $ python -m unittest tests.test_pyjsonable
@@ -13,7 +31,7 @@ class PyJasonTestBase(unittest.TestCase):
             self.assertDictEqual(jsoned_obj, obj)
             return
         if isinstance(obj, list):
-            self.assertItemsEqual(jsoned_obj, obj)
+            self.assertCountEqual(jsoned_obj, obj)
 
 
 class StrictDictTests(PyJasonTestBase):
@@ -66,8 +84,8 @@ class StrictDictTests(PyJasonTestBase):
         self.assertEqual(house_dict.get("floors"), 1)
         self.assertEqual(house_dict.floors, 1)
         expected_trees_array = ["birch", "maple", "oak"]
-        self.assertItemsEqual(house_dict.get("trees"), expected_trees_array)
-        self.assertItemsEqual(house_dict.trees, expected_trees_array)
+        self.assertCountEqual(house_dict.get("trees"), expected_trees_array)
+        self.assertCountEqual(house_dict.trees, expected_trees_array)
 
     def _test_after_update(self, house_dict):
         self.assertEqual(house_dict.get("floors"), 2)
@@ -214,6 +232,21 @@ class StrictDictExtendTests(PyJasonTestBase):
         with self.assertRaises(AttributeError):
             cake.vegan_milk_type = "almond"  # <-- cannot coexist
 
+    def test_cannot_coexist_after_removal(self):
+        cake = CakeDictCannotCoexist(milk_type="2%")
+        del cake["milk_type"]
+        cake.vegan_milk_type = "almond"
+        with self.assertRaises(AttributeError):
+            cake.milk_type = "2%"
+        cake.pop("vegan_milk_type")
+        cake["milk_type"] = "2%"
+        cake.popitem()
+        cake.vegan_milk_type = "oat"
+        cake.clear()
+        cake.milk_type = "whole"
+        with self.assertRaises(AttributeError):
+            cake.setdefault("vegan_milk_type", "soy")
+
     def test_cake_dict_only_allowed_keys(self):
         with self.assertRaises(AttributeError):
             CakeDictAllowed(
@@ -345,6 +378,41 @@ class StrictDictItemTypeTests(PyJasonTestBase):
         })
         self._test_json_dumps(cake)
 
+    def test_invalid_update_is_atomic(self):
+        cake = CakedDictTyped(
+            type="birthday",
+            is_vegan=True,
+        )
+        with self.assertRaises(TypeError):
+            cake.update(cups_sugar=5, num_layers="three")
+        with self.assertRaises(AttributeError):
+            cake.update({"cups_sugar": 5, "wack_key": 1})
+        self.assertDictEqual(cake, {"type": "birthday", "is_vegan": True})
+
+        cannot_coexist = CakeDictCannotCoexist()
+        with self.assertRaises(AttributeError):
+            cannot_coexist.update(milk_type="2%", vegan_milk_type="almond")
+        self.assertDictEqual(cannot_coexist, {})
+        cannot_coexist.update([("milk_type", "2%")])
+        with self.assertRaises(AttributeError):
+            cannot_coexist.update(vegan_milk_type="almond")
+
+    def test_in_place_union(self):
+        cake = CakedDictTyped(type="birthday", is_vegan=True)
+        with self.assertRaises(TypeError):
+            cake |= {"num_layers": "three"}
+        with self.assertRaises(AttributeError):
+            cake |= {"cups_sugar": 5, "wack_key": 1}
+        self.assertDictEqual(cake, {"type": "birthday", "is_vegan": True})
+        cake |= {"cups_sugar": 5}
+        self.assertIsInstance(cake, CakedDictTyped)
+        self.assertEqual(cake.cups_sugar, 5)
+
+        cannot_coexist = CakeDictCannotCoexist(milk_type="2%")
+        with self.assertRaises(AttributeError):
+            cannot_coexist |= {"vegan_milk_type": "almond"}
+        self.assertEqual(cannot_coexist._coexist_count, 1)
+
     def test_nullable_type(self):
         cake = CakedDictTyped(
             type="birthday",
@@ -429,6 +497,75 @@ class StrictDictItemTypeTests(PyJasonTestBase):
         )
         self._test_json_dumps(dict_type_2)
 
+class ValidationCacheTests(PyJasonTestBase):
+    def setUp(self):
+        CachedCakeDict.clear_validation_cache()
+
+    def test_cache_hits_and_evictions(self):
+        self.assertIsNone(CakeDict.validation_cache_info())
+        for _ in range(3):
+            cake = CachedCakeDict(type="birthday", is_vegan=False, hue="blue", milk_type="2%")
+        with self.assertRaises(AttributeError):
+            cake.vegan_milk_type = "almond"
+        CachedCakeDict(type="birthday", is_vegan=False, hue="red", num_layers=(1, 2))
+        CachedCakeDict(type="birthday", is_vegan=False, hue="green")
+        info = CachedCakeDict.validation_cache_info()
+        self.assertEqual((info.hits, info.misses, info.evictions, info.currsize), (2, 3, 1, 2))
+
+    def test_cache_keys_on_value_types(self):
+        CachedCakeDict(type="birthday", is_vegan=False, hue="blue", num_layers=1)
+        with self.assertRaises(TypeError):
+            CachedCakeDict(type="birthday", is_vegan=False, hue="blue", num_layers=1.0)
+
+    def test_mutable_values_not_cached(self):
+        for _ in range(2):
+            CachedCakeDict(type="birthday", is_vegan=False, hue="blue", cups_sugar=[1])
+        info = CachedCakeDict.validation_cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 0, 0))
+
+
+class ValidateTests(PyJasonTestBase):
+    def test_valid(self):
+        self.assertEqual(CakeDict.validate({"type": "birthday", "is_vegan": False, "hue": "blue"}), [])
+
+    def test_collects_all_errors(self):
+        errors = CakeDict.validate({
+            "type": "birthday",
+            "milk_type": "2%",
+            "vegan_milk_type": "almond",
+            "wack_key": 1,
+        })
+        found = dict((error.code, error) for error in errors)
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(found[ValidationError.REQUIRED].path, ("is_vegan",))
+        self.assertEqual(found[ValidationError.AT_LEAST_ONE_REQUIRED].path, ())
+        self.assertEqual(found[ValidationError.CANNOT_COEXIST].value, ["milk_type", "vegan_milk_type"])
+        self.assertEqual(found[ValidationError.NOT_ALLOWED].path, ("wack_key",))
+        self.assertEqual(found[ValidationError.NOT_ALLOWED].value, 1)
+        self.assertIn("does not allow member wack_key", found[ValidationError.NOT_ALLOWED].message)
+
+    def test_nested_errors(self):
+        with unchecked():
+            frosting = FrostingDict(cups_milk="four")
+            cakes = CakeList(CakeDict(type="birthday"))
+        list.append(cakes, "not a cake")
+        errors = CakedDictTyped.validate({
+            "type": "birthday",
+            "is_vegan": "no",
+            "frosting": frosting,
+            "decorations": cakes,
+        })
+        self.assertEqual(sorted((error.path, error.code) for error in errors), [
+            (("decorations", 0), ValidationError.AT_LEAST_ONE_REQUIRED),
+            (("decorations", 0, "is_vegan"), ValidationError.REQUIRED),
+            (("decorations", 1), ValidationError.TYPE),
+            (("frosting", "cups_milk"), ValidationError.TYPE),
+            (("frosting", "cups_powdered_sugar"), ValidationError.REQUIRED),
+            (("is_vegan",), ValidationError.TYPE),
+        ])
+        self.assertEqual(CakeList.validate([1])[0].message, "CakeList items must be of type " + str(CakeDict))
+
+
 class StrictListTests(PyJasonTestBase):
     def test_strict_list_valid(self):
         cake_list = CakeList(
@@ -486,6 +623,634 @@ class StrictListTests(PyJasonTestBase):
                 )
             )
 
+class TrustedConstructionTests(PyJasonTestBase):
+    def tearDown(self):
+        strict_objects.VERIFY_TRUSTED = False
+
+    def test_trusted_skips_validation(self):
+        cake = CakedDictTyped.trusted({"cups_sugar": "FIVE"}, is_vegan=True)
+        self.assertIsInstance(cake, CakedDictTyped)
+        self.assertDictEqual(cake, {"cups_sugar": "FIVE", "is_vegan": True})
+        cake.update(type="birthday")
+        with self.assertRaises(TypeError):
+            cake.num_layers = "three"
+
+    def test_trusted_tracks_cannot_coexist(self):
+        cake = CakeDictCannotCoexist.trusted(milk_type="2%")
+        with self.assertRaises(AttributeError):
+            cake.vegan_milk_type = "almond"
+
+    def test_unchecked_block(self):
+        with unchecked():
+            cake = CakedDictTyped(cups_sugar="FIVE")
+            cake.num_layers = "three"
+            cake.update(wack_key=1)
+        self.assertEqual(cake.num_layers, "three")
+        with self.assertRaises(TypeError):
+            cake.num_layers = "four"
+
+    def test_verify_trusted(self):
+        strict_objects.VERIFY_TRUSTED = True
+        with self.assertRaises(TypeError):
+            CakedDictTyped.trusted(type="birthday", is_vegan="no")
+        with self.assertRaises(TypeError):
+            CakeList.trusted([1])
+        with self.assertRaises(AttributeError):
+            with unchecked():
+                CakedDictTyped(cups_sugar=5)
+
+
+class PickleCopyTests(PyJasonTestBase):
+    def _cake(self):
+        # Invalid data shows nothing below is validated again
+        return CakedDictTyped.trusted(
+            type="birthday", is_vegan=False, cups_sugar="FIVE", decorations=["sprinkles", (1, 2)],
+            frosting=FrostingDict(cups_powdered_sugar=7))
+
+    def test_pickle(self):
+        cake = self._cake()
+        cakes = CakeList.trusted([CakeDictCannotCoexist(milk_type="2%"), "not a cake"])
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled = pickle.loads(pickle.dumps(cake, protocol))
+            self.assertIs(type(unpickled), CakedDictTyped)
+            self.assertIs(type(unpickled.frosting), FrostingDict)
+            self.assertEqual(unpickled, cake)
+            unpickled = pickle.loads(pickle.dumps(cakes, protocol))
+            self.assertIs(type(unpickled), CakeList)
+            self.assertEqual(unpickled, cakes)
+            with self.assertRaises(AttributeError):
+                unpickled[0].vegan_milk_type = "almond"
+
+        cake = LazyCakeDict(type="birthday", is_vegan=False, frosting={"cups_powdered_sugar": 7})
+        self.assertIs(type(dict.__getitem__(pickle.loads(pickle.dumps(cake)), "frosting")), dict)
+
+    def test_pickle_cycle(self):
+        cake = CakedDictTyped(type="birthday", is_vegan=False, decorations=["sprinkles"])
+        cake.decorations.append(cake)
+        decorations = ["sprinkles"]
+        frozen = CakedDictTyped.frozen_type()(type="birthday", is_vegan=False, decorations=decorations)
+        decorations.append(frozen)
+        cakes = CakeList()
+        list.append(cakes, cakes)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled = pickle.loads(pickle.dumps(cake, protocol))
+            self.assertIs(type(unpickled), CakedDictTyped)
+            self.assertIs(unpickled.decorations[1], unpickled)
+            unpickled = pickle.loads(pickle.dumps(frozen, protocol))
+            self.assertIs(type(unpickled), CakedDictTyped.frozen_type())
+            self.assertIs(unpickled.decorations[1], unpickled)
+            unpickled = pickle.loads(pickle.dumps(cakes, protocol))
+            self.assertIs(type(unpickled), CakeList)
+            self.assertIs(unpickled[0], unpickled)
+
+    def test_copy(self):
+        cake = self._cake()
+        copied = copy.copy(cake)
+        self.assertIs(type(copied), CakedDictTyped)
+        self.assertEqual(copied, cake)
+        self.assertIs(copied.decorations, cake.decorations)
+
+        copied = copy.deepcopy(cake)
+        self.assertIs(type(copied.frosting), FrostingDict)
+        self.assertEqual(copied, cake)
+        self.assertIsNot(copied.decorations, cake.decorations)
+        self.assertIsNot(copied.frosting, cake.frosting)
+        self.assertIs(copied.type, cake.type)
+
+        cakes = CakeList(CakeDict(type="birthday", is_vegan=False, hue="blue", milk_type="2%"))
+        cakes.append(cakes[0])
+        copied = copy.deepcopy(cakes)
+        self.assertIs(type(copied), CakeList)
+        self.assertIs(copied[0], copied[1])
+        self.assertIsNot(copied[0], cakes[0])
+        with self.assertRaises(AttributeError):
+            copied[0].vegan_milk_type = "almond"
+
+        frozen = CakedDictTyped.frozen_type()(type="birthday", is_vegan=False)
+        self.assertIs(copy.copy(frozen), frozen)
+        self.assertEqual(copy.deepcopy(frozen), frozen)
+
+
+class ValidationPlanTests(PyJasonTestBase):
+    def test_plan_compiled_per_class(self):
+        self.assertIsNot(CakeDict._plan, WeddingCakedDict._plan)
+        self.assertEqual(WeddingCakedDict._plan.required_keys, {"is_vegan", "num_guests"})
+        self.assertEqual(CakeDict._plan.allowed_keys, {
+            "num_layers", "cups_sugar", "type", "is_vegan", "color", "hue",
+            "milk_type", "vegan_milk_type"
+        })
+        self.assertIsNone(CakeDictRequired._plan.allowed_keys)
+
+    def test_plan_validators(self):
+        plan = CakedDictTyped._plan
+        self.assertTrue(plan.get_validator("frosting")(None))
+        self.assertFalse(plan.get_validator("cups_sugar")("FIVE"))
+        self.assertIsNone(plan.get_validator("decorations"))
+        self.assertTrue(PartyBudget._plan.get_validator("anything")(
+            PartyExpenseItem(cost_per_guest=1, total_cost=2)))
+        self.assertIn("or None", plan.type_message("frosting"))
+
+
+class StrictListMutationTests(PyJasonTestBase):
+    def test_mutations_validated(self):
+        tags = TagList("a", "b")
+        tags.extend(["c", "d"])
+        tags.insert(0, "z")
+        tags[0] = "y"
+        tags[1:3] = ("x", "w", "v")
+        tags[::2] = ["1", "2", "3"]
+        tags += ["e"]
+        self.assertEqual(tags, ["1", "x", "2", "v", "3", "d", "e"])
+        for mutate in (
+            lambda: tags.extend(["f", 1]),
+            lambda: tags.extend(iter([None])),
+            lambda: tags.insert(0, 1),
+            lambda: tags.__setitem__(0, 1),
+            lambda: tags.__setitem__(slice(0, 2), ["f", 1]),
+            lambda: tags.__setitem__(slice(None, None, 4), ["f", 1]),
+            lambda: tags.__iadd__(["f", 1]),
+            lambda: tags + ["f", 1],
+        ):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual(tags, ["1", "x", "2", "v", "3", "d", "e"])
+
+    def test_add(self):
+        tags = TagList("a") + ["b"]
+        self.assertIsInstance(tags, TagList)
+        self.assertEqual(tags, ["a", "b"])
+        with self.assertRaises(TypeError):
+            TagList("a") + ("b",)
+        with self.assertRaises(TypeError):
+            TagList("a", 2)
+
+
+class FrozenStrictDictTests(PyJasonTestBase):
+    def test_frozen_type(self):
+        FrozenCake = CakedDictTyped.frozen_type()
+        self.assertIs(FrozenCake, CakedDictTyped.frozen_type())
+        self.assertIs(FrozenCake.frozen_type(), FrozenCake)
+        self.assertTrue(issubclass(FrozenCake, CakedDictTyped))
+        with self.assertRaises(TypeError):
+            FrozenCake(type="birthday", is_vegan="no")
+
+        cake = FrozenCake(type="birthday", is_vegan=False, decorations=("sprinkles",))
+        self.assertEqual(cake.type, "birthday")
+        self.assertEqual(json.loads(json.dumps(cake))["decorations"], ["sprinkles"])
+        for mutate in (
+            lambda: cake.__setitem__("cups_sugar", 5),
+            lambda: cake.__delitem__("type"),
+            lambda: cake.update(cups_sugar=5),
+            lambda: cake.pop("type"),
+            lambda: cake.setdefault("cups_sugar", 5),
+            lambda: cake.clear(),
+            lambda: cake.__ior__({"cups_sugar": 5}),
+        ):
+            with self.assertRaises(TypeError):
+                mutate()
+        with self.assertRaises(AttributeError):
+            cake.cups_sugar = 5
+        self.assertEqual(hash(cake), hash(FrozenCake(cake)))
+        self.assertEqual(len(set([cake, FrozenCake(cake)])), 1)
+        self.assertEqual(pickle.loads(pickle.dumps(cake)), cake)
+        self.assertIs(type(pickle.loads(pickle.dumps(cake))), FrozenCake)
+
+    def test_evolve(self):
+        frosting = FrostingDict(cups_powdered_sugar=7).frozen_type()(cups_powdered_sugar=7)
+        cake = FrozenCakeDict(type="birthday", is_vegan=False, hue="blue", milk_type="2%", num_layers=frosting)
+        evolved = cake.evolve(hue="red", milk_type="whole")
+        self.assertEqual(evolved.hue, "red")
+        self.assertEqual(cake.hue, "blue")
+        self.assertIs(evolved.num_layers, cake.num_layers)
+        self.assertIsInstance(evolved, FrozenCakeDict)
+        with self.assertRaises(AttributeError):
+            cake.evolve(vegan_milk_type="almond")
+        with self.assertRaises(AttributeError):
+            cake.evolve(wack_key=1)
+        with self.assertRaises(TypeError):
+            FrozenCakedDictTyped(type="birthday", is_vegan=False).evolve(cups_sugar="FIVE")
+
+    def test_nested_dicts_are_frozen(self):
+        frosting = FrostingDict(cups_powdered_sugar=7)
+        cake = FrozenCakedDictTyped(type="birthday", is_vegan=False, frosting=frosting)
+        self.assertIsInstance(cake.frosting, FrostingDict.frozen_type())
+        frosting.cups_milk = 2
+        self.assertNotIn("cups_milk", cake.frosting)
+        self.assertEqual(hash(cake), hash(FrozenCakedDictTyped(cake)))
+        with self.assertRaises(TypeError):
+            cake.frosting["cups_milk"] = 2
+
+        evolved = cake.evolve(frosting=frosting)
+        self.assertIsInstance(evolved.frosting, FrozenStrictDict)
+        self.assertIsInstance(FrozenCakedDictTyped.trusted(cake, frosting=frosting).frosting, FrozenStrictDict)
+
+        # Other mutable values are kept as given
+        with self.assertRaises(TypeError):
+            hash(FrozenCakedDictTyped(type="birthday", is_vegan=False, decorations=["sprinkles"]))
+
+
+class LazyKeysTests(PyJasonTestBase):
+    def test_converted_on_read(self):
+        cake = LazyCakeDict(type="birthday", is_vegan=False, frosting={"cups_powdered_sugar": 7},
+                            tiers=[{"type": "birthday", "is_vegan": True, "hue": "red"}])
+        self.assertIs(type(dict.__getitem__(cake, "frosting")), dict)
+        self.assertIsInstance(cake.frosting, FrostingDict)
+        self.assertIs(cake["frosting"], cake.frosting)
+        self.assertIsInstance(cake.get("tiers"), CakeList)
+        self.assertIsInstance(cake.tiers[0], CakeDict)
+        self._test_json_dumps(cake)
+
+        with self.assertRaises(TypeError):
+            cake.frosting = {"cups_powdered_sugar": 7, "cups_milk": "four"}
+            cake.frosting
+        with self.assertRaises(TypeError):
+            cake.frosting = ["not", "frosting"]
+        with self.assertRaises(TypeError):
+            LazyCakeDict(type="birthday", is_vegan=False, frosting=7)
+
+    def test_validated_before_serializing(self):
+        def invalid_cake():
+            return LazyCakeDict(type="birthday", is_vegan=False, frosting={"cups_milk": 4})
+        with self.assertRaises(AttributeError):
+            json.dumps(invalid_cake())
+        with self.assertRaises(AttributeError):
+            encoder.dumps(invalid_cake())
+        with self.assertRaises(AttributeError):
+            invalid_cake().materialize()
+        with self.assertRaises(AttributeError):
+            list(invalid_cake().items())
+
+    def test_validate_checks_plain_values(self):
+        errors = LazyCakeDict.validate({
+            "type": "birthday",
+            "is_vegan": False,
+            "frosting": {"cups_powdered_sugar": 7, "cups_milk": "four"},
+            "tiers": [{"type": "birthday", "is_vegan": True}],
+        })
+        self.assertEqual(sorted((error.path, error.code) for error in errors), [
+            (("frosting", "cups_milk"), ValidationError.TYPE),
+            (("tiers", 0), ValidationError.AT_LEAST_ONE_REQUIRED),
+        ])
+
+    def test_lazy_keys_need_nested_types(self):
+        with self.assertRaises(TypeError):
+            class LazyLayersDict(CakedDictTyped):
+                class Meta(CakedDictTyped.Meta):
+                    lazy_keys = ("num_layers",)
+        with self.assertRaises(TypeError):
+            class LazyBudget(PartyBudget):
+                class Meta(PartyBudget.Meta):
+                    lazy_keys = ("food",)
+
+
+class AnnotationTests(PyJasonTestBase):
+    def test_same_plan_as_meta(self):
+        self.assertEqual(AnnotatedFrostingDict._plan.type_specs, FrostingDict._plan.type_specs)
+        with self.assertRaises(TypeError):
+            AnnotatedFrostingDict(cups_powdered_sugar=7, cups_milk="four")
+        self.assertEqual(AnnotatedFrostingDict(cups_powdered_sugar=7, cups_milk=4).cups_milk, 4)
+
+    def test_annotated_members(self):
+        cake = AnnotatedCakeDict(
+            type="birthday",
+            frosting=None,
+            decorations=["sprinkles"],
+            layer_grams={"vanilla": 300},
+            tiers=(3, 2),
+            topping=ComplexLink(href="www.candles.com"),
+        )
+        cake.frosting = FrostingDict(cups_powdered_sugar=7)
+        cake.topping = "candles"
+        cake.tiers = ()
+        self.assertEqual(json.loads(json.dumps(cake))["tiers"], [])
+        self.assertNotIn("version", AnnotatedCakeDict._plan.declared_keys)
+
+        for key, value in (
+            ("frosting", {"cups_powdered_sugar": 7}),
+            ("decorations", ["sprinkles", 7]),
+            ("decorations", ("sprinkles",)),
+            ("layer_grams", {"vanilla": "300"}),
+            ("layer_grams", {1: 300}),
+            ("tiers", ("3",)),
+            ("topping", 7),
+            ("pans", (9,)),
+            ("pans", ("9", 9)),
+        ):
+            with self.assertRaises(TypeError):
+                cake[key] = value
+        with self.assertRaises(AttributeError):
+            cake["wack_key"] = 1
+        cake.pans = (9, "round")
+
+        errors = AnnotatedCakeDict.validate({"type": "birthday", "decorations": [7]})
+        self.assertEqual(len(errors), 1)
+        self.assertIn("List[str]", errors[0].message)
+
+    def test_invalid_annotations(self):
+        with self.assertRaises(TypeError):
+            class TwiceTypedDict(FrostingDict):
+                cups_milk: float
+        with self.assertRaises(TypeError):
+            class UnsupportedDict(StrictDict):
+                callback: ClassVar
+                method: "typing.Callable[[], None]"
+        with self.assertRaises(TypeError):
+            class DefaultedDict(StrictDict):
+                name: str = "default"
+
+    def test_self_reference(self):
+        class TreeNode(StrictDict):
+            name: str
+            child: "Optional[TreeNode]"
+
+        tree = TreeNode(name="root", child=TreeNode(name="leaf", child=None))
+        self.assertEqual(tree.child.name, "leaf")
+        with self.assertRaises(TypeError):
+            tree.child = "leaf"
+
+
+class AttributeAccessTests(PyJasonTestBase):
+    def test_declared_key_properties(self):
+        self.assertIsInstance(CakeDict.__dict__["color"], property)
+        self.assertNotIsInstance(CakeDict.__dict__.get("get"), property)
+        cake = CakeDict(type="birthday", is_vegan=False, color="red")
+        self.assertEqual(cake.color, "red")
+        cake.num_layers = 3
+        self.assertEqual(cake["num_layers"], 3)
+        self.assertFalse(hasattr(cake, "hue"))
+        self.assertEqual(getattr(cake, "hue", "none"), "none")
+        with self.assertRaises(AttributeError):
+            cake.wack_key = 1
+
+    def test_missing_member_raises_attribute_error(self):
+        house_dict = StrictDict(type="bungalow")
+        self.assertEqual(house_dict.type, "bungalow")
+        self.assertFalse(hasattr(house_dict, "floors"))
+        self.assertIsNone(getattr(house_dict, "floors", None))
+        self.assertDictEqual(copy.copy(house_dict), house_dict)
+        self.assertDictEqual(copy.deepcopy(house_dict), house_dict)
+
+
+class StrictRecordTests(PyJasonTestBase):
+    def test_record_type(self):
+        CakeRecord = CakedDictTyped.record_type()
+        self.assertIs(CakeRecord, CakedDictTyped.record_type())
+        self.assertTrue(issubclass(CakeRecord, StrictRecord))
+        with self.assertRaises(TypeError):
+            CakeDictRequired.record_type()
+
+        cake = CakeRecord(type="birthday", is_vegan=False, cups_sugar=5)
+        self.assertIsInstance(cake, Mapping)
+        self.assertFalse(hasattr(cake, "__dict__"))
+        self.assertEqual(cake.cups_sugar, 5)
+        self.assertEqual(cake["type"], "birthday")
+        self.assertEqual(len(cake), 3)
+        self.assertNotIn("frosting", cake)
+        self.assertEqual(cake, {"type": "birthday", "is_vegan": False, "cups_sugar": 5})
+        with self.assertRaisesRegex(AttributeError, "CakedDictTypedRecord has no member 'frosting'"):
+            cake.frosting
+        with self.assertRaises(AttributeError):
+            cake.wack_key
+        with self.assertRaises(KeyError):
+            cake["frosting"]
+        with self.assertRaises(TypeError):
+            cake["cups_sugar"] = 6
+        self.assertEqual(json.loads(encoder.dumps(cake)), cake)
+        self.assertEqual(json.loads(json.dumps(cake, default=encoder.default)), cake)
+        # Not a dict, so json.dumps needs the encoder's default
+        with self.assertRaises(TypeError):
+            json.dumps(cake)
+        self.assertEqual(pickle.loads(pickle.dumps(cake)), cake)
+        self.assertIsInstance(cake.to_strict_dict(), CakedDictTyped)
+
+    def test_record_validation(self):
+        CakeRecord = CakedDictTyped.record_type()
+        with self.assertRaises(AttributeError):
+            CakeRecord(type="birthday")
+        with self.assertRaises(AttributeError):
+            CakeRecord(type="birthday", is_vegan=False, wack_key=1)
+        with self.assertRaises(TypeError):
+            CakeRecord(type="birthday", is_vegan=False, cups_sugar="FIVE")
+
+        cake = CakeRecord(type="birthday", is_vegan=False)
+        cake.frosting = None
+        cake.num_layers = 2
+        with self.assertRaises(TypeError):
+            cake.num_layers = "two"
+        del cake.num_layers
+        self.assertNotIn("num_layers", cake)
+        with self.assertRaises(AttributeError):
+            del cake.is_vegan
+
+        cake = CakeDict.record_type()(type="birthday", is_vegan=False, hue="blue", milk_type="2%")
+        with self.assertRaises(AttributeError):
+            cake.vegan_milk_type = "almond"
+
+
+class StrictArrayTests(PyJasonTestBase):
+    def test_from_plain_lists(self):
+        profile = UserProfile(history=UserHistory(1, 2))
+        profile.patch({"history": [4, 5], "scores": [0.5, 1], "flags": [True]})
+        self.assertIsInstance(profile.history, UserHistory)
+        self.assertEqual(profile.history.tolist(), [4, 5])
+        self.assertIsInstance(profile.scores, UserScores)
+        self.assertIsInstance(profile.flags, UserFlags)
+        with self.assertRaises(TypeError):
+            profile.patch({"history": [1.5]})
+        self.assertEqual(profile.history.tolist(), [4, 5])
+
+        self.assertEqual(UserProfile.validate({"history": [1], "flags": [False]}), [])
+        self.assertEqual([(error.path, error.code, error.value) for error in UserProfile.validate(
+            {"history": [1, "two"], "flags": [1]})],
+            [(("history", 1), ValidationError.TYPE, "two"), (("flags", 0), ValidationError.TYPE, 1)])
+
+    def test_typecode_enforces_item_type(self):
+        history = UserHistory(1, 2, 3)
+        history.append(4)
+        history.extend([5, 6])
+        self.assertEqual(history.tolist(), [1, 2, 3, 4, 5, 6])
+        with self.assertRaises(TypeError):
+            history.append("seven")
+        with self.assertRaises(TypeError):
+            UserHistory(1.5)
+        self.assertEqual(UserScores(1, 2.5).tolist(), [1.0, 2.5])
+        with self.assertRaises(TypeError):
+            StrictArrayTests._declare_array(str)
+
+    @staticmethod
+    def _declare_array(declared_type):
+        class TextArray(StrictArray):
+            class Meta:
+                item_type = declared_type
+        return TextArray
+
+    def test_bool_items(self):
+        flags = UserFlags(True, False)
+        flags.append(True)
+        flags[1] = True
+        self.assertEqual(list(flags), [True, True, True])
+        self.assertIs(flags[0], True)
+        self.assertIsInstance(flags[:2], UserFlags)
+        self.assertIs(flags.pop(), True)
+        for mutate in (
+            lambda: flags.append(1),
+            lambda: flags.extend([True, 2]),
+            lambda: flags.__setitem__(0, 0),
+        ):
+            with self.assertRaises(TypeError):
+                mutate()
+        self.assertEqual(flags.tolist(), [True, True])
+
+        with self.assertRaises(TypeError):
+            flags.frombytes(b"\x05")
+        with self.assertRaises(TypeError):
+            flags += array.array("B", [5])
+        with self.assertRaises(TypeError):
+            strict_objects._rebuild_strict_array(UserFlags, b"\x05")
+        self.assertEqual(flags.tolist(), [True, True])
+
+    def test_float_items(self):
+        scores = UserScores(0.5)
+        for mutate in (
+            lambda: scores.append(True),
+            lambda: scores.extend([1.5, False]),
+            lambda: scores.__setitem__(0, True),
+            lambda: UserScores(True),
+        ):
+            with self.assertRaises(TypeError):
+                mutate()
+        scores.append(2)
+        self.assertEqual(scores.tolist(), [0.5, 2.0])
+
+    def test_operations_keep_class(self):
+        history = UserHistory(1, 2, 3)
+        for derived in (history[1:], copy.copy(history), copy.deepcopy(history), history + history,
+                        history * 2, 2 * history):
+            self.assertIsInstance(derived, UserHistory)
+        self.assertEqual((history + UserHistory(4)).tolist(), [1, 2, 3, 4])
+        self.assertEqual(history[-1], 3)
+        flags = UserFlags(True, False)
+        self.assertEqual((flags + UserFlags(True)).tolist(), [True, False, True])
+        self.assertIsInstance(copy.copy(flags), UserFlags)
+        with self.assertRaises(TypeError):
+            flags + array.array("B", [5])
+        with self.assertRaises(TypeError):
+            history + [4]
+
+    def test_buffer_and_pickle(self):
+        history = UserHistory(1, 2, 3)
+        view = memoryview(history).cast("B")
+        self.assertEqual(len(view), 3 * history.itemsize)
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled = pickle.loads(pickle.dumps(history, protocol))
+            self.assertIsInstance(unpickled, UserHistory)
+            self.assertEqual(unpickled, history)
+        self.assertEqual(pickle.loads(pickle.dumps(UserFlags(True))).tolist(), [True])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        history = UserHistory(1, 2, 3)
+        self.assertEqual(history.to_numpy().sum(), 6)
+        self.assertEqual(UserFlags.from_numpy(numpy.array([True, False])).tolist(), [True, False])
+
+
+class StrictTableTests(PyJasonTestBase):
+    def _cakes(self):
+        return [
+            {"type": "birthday", "is_vegan": False, "cups_sugar": 5, "frosting": None},
+            {"type": "wedding", "is_vegan": True, "frosting": FrostingDict(cups_powdered_sugar=7)},
+            CakedDictTyped(type="sheet", is_vegan=False, cups_sugar=2, num_layers=1),
+        ]
+
+    def test_columns(self):
+        CakeTable = CakedDictTyped.table_type()
+        self.assertIs(CakeTable, CakedDictTyped.table_type())
+        self.assertIs(CakeTable.row_class, CakedDictTyped)
+        cakes = CakeTable(self._cakes())
+        self.assertEqual(len(cakes), 3)
+        self.assertFalse(hasattr(cakes, "__dict__"))
+        self.assertEqual(cakes._columns["cups_sugar"].values.typecode, "q")
+        self.assertEqual(cakes._columns["is_vegan"].values.typecode, "B")
+        self.assertEqual(cakes.column("cups_sugar"), [5, None, 2])
+        self.assertEqual(cakes.column("is_vegan"), [False, True, False])
+        self.assertEqual(cakes.column("frosting", default="none"), [None, {"cups_powdered_sugar": 7}, "none"])
+        self.assertEqual(cakes.to_strict_dicts(), self._cakes())
+        self.assertIsInstance(cakes.to_strict_dicts()[0], CakedDictTyped)
+        self.assertEqual([dict(cake) for cake in cakes[1:]], self._cakes()[1:])
+
+        cakes = PartyExpenseItem.table_type()([
+            {"cost_per_guest": 1, "total_cost": 2},
+            {"cost_per_guest": 3, "total_cost": 4, "note": "cash"},
+        ])
+        self.assertEqual(cakes.column("note"), [None, "cash"])
+        self.assertEqual(cakes[1], {"cost_per_guest": 3, "total_cost": 4, "note": "cash"})
+
+    def test_validation(self):
+        CakeTable = CakedDictTyped.table_type()
+        with self.assertRaises(AttributeError):
+            CakeTable([{"type": "birthday"}])
+        with self.assertRaises(AttributeError):
+            CakeTable([{"type": "birthday", "is_vegan": False, "wack_key": 1}])
+        with self.assertRaises(AttributeError):
+            CakeDict.table_type()([{"type": "birthday", "is_vegan": False, "hue": "blue",
+                                    "milk_type": "2%", "vegan_milk_type": "almond"}])
+        with self.assertRaises(TypeError):
+            CakeTable([{"type": "birthday", "is_vegan": "no"}])
+        with self.assertRaises(TypeError):
+            CakeTable([{"type": "birthday", "is_vegan": False, "num_layers": None}])
+
+        cakes = CakeTable(self._cakes())
+        with self.assertRaises(TypeError):
+            cakes.extend([{"type": "birthday", "is_vegan": False}, {"type": "birthday", "is_vegan": 1}])
+        self.assertEqual(len(cakes), 3)
+        # Values an array can't hold move the column to a list
+        cakes.append({"type": "birthday", "is_vegan": False, "cups_sugar": 2 ** 70})
+        cakes[0].cups_sugar = True
+        self.assertEqual(cakes.column("cups_sugar"), [True, None, 2, 2 ** 70])
+        self.assertIs(cakes[0].cups_sugar, True)
+
+    def test_row_views(self):
+        cakes = CakedDictTyped.table_type()(self._cakes())
+        cake = cakes[-1]
+        self.assertIsInstance(cake, Mapping)
+        self.assertEqual(cake.type, "sheet")
+        self.assertEqual(cake["num_layers"], 1)
+        self.assertNotIn("frosting", cake)
+        with self.assertRaises(AttributeError):
+            cake.frosting
+        with self.assertRaises(KeyError):
+            cake["frosting"]
+
+        cake.cups_sugar = 3
+        cake["frosting"] = None
+        self.assertEqual(cakes.column("cups_sugar"), [5, None, 3])
+        self.assertIsNone(cakes[2].frosting)
+        with self.assertRaises(TypeError):
+            cake.cups_sugar = "three"
+        with self.assertRaises(AttributeError):
+            cake.wack_key = 1
+        with self.assertRaises(AttributeError):
+            del cake.is_vegan
+        del cake.num_layers
+        self.assertEqual(cake.to_strict_dict(),
+                         CakedDictTyped(type="sheet", is_vegan=False, cups_sugar=3, frosting=None))
+        self.assertEqual([row.type for row in cakes], ["birthday", "wedding", "sheet"])
+
+    def test_json_and_pickle(self):
+        cakes = CakedDictTyped.table_type()(self._cakes())
+        self.assertEqual(json.loads(encoder.dumps(cakes)), self._cakes())
+        self.assertEqual(json.loads(json.dumps(cakes, default=encoder.default)), self._cakes())
+        unpickled = pickle.loads(pickle.dumps(cakes))
+        self.assertIs(type(unpickled), type(cakes))
+        self.assertEqual(unpickled.to_strict_dicts(), self._cakes())
+
+        cakes = LazyCakeDict.table_type()([{"type": "birthday", "is_vegan": False,
+                                            "frosting": {"cups_powdered_sugar": 7}}])
+        self.assertIsInstance(cakes[0].frosting, FrostingDict)
+        with self.assertRaises(AttributeError):
+            LazyCakeDict.table_type()([{"type": "birthday", "is_vegan": False, "frosting": {"cups_milk": 4}}])
+
+
 #
 # Test objects
 #
@@ -501,6 +1266,17 @@ class CakeDict(StrictDict):
         allowed_keys = {"num_layers", "cups_sugar"}
 
 
+class CachedCakeDict(StrictDict):
+    class Meta(CakeDict.Meta):
+        item_type = {"num_layers": (int, tuple)}
+        validation_cache_size = 2
+
+
+class FrozenCakeDict(FrozenStrictDict):
+    class Meta(CakeDict.Meta):
+        pass
+
+
 class WeddingCakedDict(CakeDict):
     class Meta(CakeDict.Meta):
         required_keys = {"is_vegan", "num_guests"}
@@ -551,10 +1327,51 @@ class CakedDictTyped(CakeDict):
             }
         }
 
+class AnnotatedFrostingDict(StrictDict):
+    class Meta:
+        required_keys = {"cups_powdered_sugar"}
+
+    cups_milk: int
+
+
+class FrozenCakedDictTyped(FrozenStrictDict, CakedDictTyped):
+    pass
+
+
+class UserHistory(StrictArray):
+    class Meta:
+        item_type = int
+
+class UserScores(StrictArray):
+    class Meta:
+        item_type = float
+
+class UserFlags(StrictArray):
+    class Meta:
+        item_type = bool
+
+class UserProfile(StrictDict):
+    class Meta:
+        item_type = {
+            "history": UserHistory,
+            "scores": UserScores,
+            "flags": UserFlags,
+        }
+
+class TagList(StrictList):
+    pass
+
 class CakeList(StrictList):
     class Meta:
         item_type = CakeDict
 
+
+class LazyCakeDict(CakedDictTyped):
+    class Meta(CakedDictTyped.Meta):
+        allowed_keys = CakedDictTyped.Meta.allowed_keys | {"tiers"}
+        item_type = dict(CakedDictTyped.Meta.item_type, tiers=CakeList)
+        lazy_keys = ("frosting", "tiers")
+
 class PartyExpenseItem(StrictDict):
     class Meta:
         required_keys = {"cost_per_guest", "total_cost"}
@@ -569,12 +1386,25 @@ class ComplexLink(StrictDict):
 
 class UrlLinkMap(StrictDict):
     class Meta:
-        item_type = (ComplexLink, basestring)
+        item_type = (ComplexLink, str)
 
 class SiteInfoMap(StrictDict):
     class Meta:
         item_type = {
-            "more_link": (ComplexLink, basestring),
+            "more_link": (ComplexLink, str),
             "total_pages": int
         }
 
+class AnnotatedCakeDict(StrictDict):
+    class Meta:
+        required_keys = {"type"}
+        allowed_keys = {"num_layers"}
+
+    version: ClassVar[int] = 1
+    type: str
+    frosting: Optional[FrostingDict]
+    decorations: List[str]
+    layer_grams: Dict[str, int]
+    tiers: Tuple[int, ...]
+    pans: Tuple[int, Union[int, str]]
+    topping: Union[ComplexLink, str]
@@ -0,0 +1,174 @@
+import json
+import os
+import pickle
+import tempfile
+
+from pyjsonable import binary, registry, strict_objects
+from pyjsonable.strict_objects import StrictDict
+from tests.test_pyjsonable import (PyJasonTestBase, CakeDict, CakeList, CakedDictTyped, FrostingDict,
+    AnnotatedCakeDict, LazyCakeDict)
+
+# To run:
+# $ python -m unittest tests.test_registry
+
+
+class RegistryTests(PyJasonTestBase):
+    def test_classes(self):
+        found = registry.classes()
+        self.assertIn(CakeDict, found)
+        self.assertIn(CakeList, found)
+        CakedDictTyped.frozen_type()
+        self.assertNotIn(CakedDictTyped.frozen_type(), registry.classes())
+        self.assertIs(registry.get("tests.test_pyjsonable:FrostingDict"), FrostingDict)
+        self.assertIsNone(registry.get("tests.test_pyjsonable:NoSuchDict"))
+
+
+class JSONSchemaTests(PyJasonTestBase):
+    def test_json_schema(self):
+        schema = registry.json_schema(CakedDictTyped)
+        self.assertEqual(schema["$ref"], "#/$defs/tests.test_pyjsonable:CakedDictTyped")
+        cake = schema["$defs"]["tests.test_pyjsonable:CakedDictTyped"]
+        self.assertEqual(cake["required"], ["is_vegan", "type"])
+        self.assertIs(cake["additionalProperties"], False)
+        self.assertEqual(cake["properties"]["frosting"], {"anyOf": [
+            {"$ref": "#/$defs/tests.test_pyjsonable:FrostingDict"}, {"type": "null"}]})
+        self.assertIn("tests.test_pyjsonable:FrostingDict", schema["$defs"])
+
+        cake = registry.json_schema(CakeDict)["$defs"]["tests.test_pyjsonable:CakeDict"]
+        self.assertEqual(cake["anyOf"], [{"required": ["color"]}, {"required": ["hue"]}])
+        self.assertEqual(cake["not"], {"anyOf": [{"required": ["milk_type", "vegan_milk_type"]}]})
+
+        cake = registry.json_schema(AnnotatedCakeDict)["$defs"]["tests.test_pyjsonable:AnnotatedCakeDict"]
+        self.assertEqual(cake["properties"]["layer_grams"],
+                         {"type": "object", "additionalProperties": {"type": "integer"}})
+        self.assertEqual(cake["properties"]["pans"]["prefixItems"],
+                         [{"type": "integer"}, {"type": ["integer", "string"]}])
+
+    def test_round_trip(self):
+        exported = registry.export_schemas([CakedDictTyped, LazyCakeDict, AnnotatedCakeDict, CakeList])
+        self.assertIn("tests.test_pyjsonable:CakeDict", exported["$defs"])
+        rebuilt = registry.from_json_schema(json.loads(json.dumps(exported)))
+        self.assertEqual(registry.export_schemas(list(rebuilt.values()))["$defs"], exported["$defs"])
+
+        Cake = rebuilt["tests.test_pyjsonable:CakedDictTyped"]
+        self.assertIsNot(Cake, CakedDictTyped)
+        Frosting = rebuilt["tests.test_pyjsonable:FrostingDict"]
+        Cake(type="birthday", is_vegan=False, frosting=Frosting(cups_powdered_sugar=7))
+        with self.assertRaises(TypeError):
+            Cake(type="birthday", is_vegan=False, frosting=FrostingDict(cups_powdered_sugar=7))
+        with self.assertRaises(AttributeError):
+            Cake(type="birthday")
+        with self.assertRaises(AttributeError):
+            Cake(type="birthday", is_vegan=False, hue="red")
+        with self.assertRaises(TypeError):
+            Cake(type="birthday", is_vegan="no")
+        with self.assertRaises(AttributeError):
+            rebuilt["tests.test_pyjsonable:CakeDict"](type="birthday", is_vegan=False, hue="red",
+                                                      milk_type="oat", vegan_milk_type="oat")
+
+        Lazy = rebuilt["tests.test_pyjsonable:LazyCakeDict"]
+        self.assertEqual(Lazy._plan.lazy_types.keys(), LazyCakeDict._plan.lazy_types.keys())
+
+        # Rebuilt classes keep their names, so they read data from the originals
+        data = binary.dumps(CakedDictTyped(type="birthday", is_vegan=False))
+        self.assertIsInstance(binary.loads(data, classes=rebuilt.values()), Cake)
+
+    def test_foreign_schema(self):
+        classes = registry.from_json_schema({
+            "title": "Order",
+            "type": "object",
+            "properties": {"id": {"type": "integer"}, "tags": {"type": "array", "items": {"type": "string"}}},
+            "required": ["id"],
+        })
+        Order = classes["Order"]
+        self.assertTrue(issubclass(Order, StrictDict))
+        self.assertEqual(Order(id=1, tags=["new"]).tags, ["new"])
+        with self.assertRaises(TypeError):
+            Order(id=1, tags=[1])
+        with self.assertRaises(ValueError):
+            registry.from_json_schema({"$defs": {"A": {"type": "object", "properties": {
+                "a": {"$ref": "#/$defs/A"}}}}})
+
+
+class PlanCacheTests(PyJasonTestBase):
+    def test_plan_pickles(self):
+        plan = pickle.loads(pickle.dumps(AnnotatedCakeDict._plan))
+        self.assertEqual(plan.type_specs, AnnotatedCakeDict._plan.type_specs)
+        self.assertFalse(plan.get_validator("pans")((1, 2.5)))
+        self.assertTrue(plan.get_validator("pans")((1, "two")))
+        plan = pickle.loads(pickle.dumps(LazyCakeDict._plan))
+        self.assertTrue(plan.get_validator("tiers")([]))
+
+    def test_plan_cache(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "plans.cache")
+        cache = registry._PlanCache(path)
+        cache.plan(AnnotatedCakeDict)
+        # Plans from Meta alone compile faster than they load
+        cache.plan(CakeDict)
+        self.assertEqual(list(cache.entries), ["tests.test_pyjsonable:AnnotatedCakeDict"])
+        cache.save()
+
+        cache = registry._PlanCache(path)
+        plan = cache.plan(AnnotatedCakeDict)
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        self.assertEqual(plan.type_hints, AnnotatedCakeDict._plan.type_hints)
+        self.assertFalse(plan.get_validator("decorations")([1]))
+
+        # An edited module invalidates its plans
+        name = "tests.test_pyjsonable:AnnotatedCakeDict"
+        fingerprint, data = cache.entries[name]
+        cache.entries[name] = ((fingerprint[0], ()), data)
+        cache.plan(AnnotatedCakeDict)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        with open(path, "wb") as fp:
+            fp.write(b"not a cache")
+        self.assertEqual(registry._PlanCache(path).entries, {})
+        os.remove(path)
+        os.rmdir(directory)
+
+    def test_enable_plan_cache(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "plans.cache")
+        enabled = registry._plan_cache
+        registry.enable_plan_cache(path)
+        try:
+            plan = strict_objects._compile_class(AnnotatedCakeDict)
+            self.assertIs(AnnotatedCakeDict._plan, plan)
+            self.assertEqual(registry.plan_cache_info(), (0, 1))
+            registry.save_plan_cache()
+            self.assertTrue(os.path.exists(path))
+        finally:
+            registry.disable_plan_cache()
+            self.assertIsNone(registry.plan_cache_info())
+            if enabled is not None:
+                registry._plan_cache = enabled
+                strict_objects._plan_loader = enabled.plan
+        os.remove(path)
+        os.rmdir(directory)
+
+
+class LazyPlanTests(PyJasonTestBase):
+    def setUp(self):
+        strict_objects.LAZY_PLANS = True
+
+    def tearDown(self):
+        strict_objects.LAZY_PLANS = False
+
+    def test_compiled_on_first_use(self):
+        class LazyPlanCakeDict(LazyCakeDict):
+            pass
+
+        class BrokenCakeDict(StrictDict):
+            class Meta:
+                lazy_keys = ("frosting",)
+
+        self.assertIsInstance(vars(LazyPlanCakeDict)["_plan"], strict_objects._DeferredPlan)
+        cake = LazyPlanCakeDict(type="birthday", is_vegan=False, frosting={"cups_powdered_sugar": 7})
+        self.assertIsInstance(vars(LazyPlanCakeDict)["_plan"], strict_objects.ValidationPlan)
+        self.assertIsInstance(cake.frosting, FrostingDict)
+        with self.assertRaises(TypeError):
+            cake.cups_sugar = "five"
+        with self.assertRaises(TypeError):
+            BrokenCakeDict()